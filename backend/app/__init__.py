@@ -1,4 +1,4 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from flask_restful import Api
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
@@ -22,6 +22,11 @@ def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    # Encode jsonify() responses through the shared fast encoder
+    from .json_encoding import FastJSONProvider
+    app.json = FastJSONProvider(app)
+    app.json.sort_keys = Config.JSON_SORT_KEYS
+
     # Configure CORS - allow frontend origins from environment or defaults
     allowed_origins = Config.CORS_ORIGINS
     logger.info(f"CORS configured for origins: {allowed_origins}")
@@ -34,9 +39,14 @@ def create_app():
          expose_headers=["Content-Type", "Authorization"]
     )
 
+    # Profile Mongo commands per request; registered before the client exists
+    if Config.QUERY_PROFILING:
+        from .query_profiler import query_profiler
+        query_profiler.init_app(app)
+
     # Connect MongoDB with error handling
     try:
-        connect(host=Config.MONGO_URI)
+        connect(host=Config.MONGO_URI, **Config.mongo_client_options())
         logger.info("MongoDB connection successful")
         app.mongodb_connected = True
     except Exception as e:
@@ -57,6 +67,24 @@ def create_app():
     app.register_blueprint(likes_bp)
     app.register_blueprint(seller_bp)
 
+    # Recommendation job workers in this process; started again in each forked worker
+    if app.mongodb_connected:
+        try:
+            from recommendation_worker import start_embedded_workers
+        except ImportError:
+            logger.warning("Recommendation workers not available")
+        else:
+            start_embedded_workers()
+            app.before_request(start_embedded_workers)
+
+    # Report query shapes that are not served by an index
+    if Config.CHECK_QUERY_PLANS and app.mongodb_connected:
+        from .query_plans import report_query_plans
+        try:
+            report_query_plans()
+        except Exception as e:
+            logger.error(f"Query plan check failed: {str(e)}")
+
     # Error handlers for production
     @app.errorhandler(404)
     def not_found(error):
@@ -85,6 +113,25 @@ def create_app():
             "environment": Config.ENV
         }), 200
 
+    # Runtime metrics
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        from .view_buffer import view_buffer
+        from .response_cache import response_cache
+        return jsonify({
+            "view_buffer": view_buffer.stats(),
+            "response_cache": response_cache.stats(),
+        }), 200
+
+    # Mongo commands and db time per route
+    @app.route("/metrics/queries", methods=["GET", "DELETE"])
+    def query_metrics():
+        from .query_profiler import query_profiler
+        if request.method == "DELETE":
+            query_profiler.reset()
+            return jsonify({"message": "Query metrics reset"}), 200
+        return jsonify(dict(query_profiler.stats(), enabled=Config.QUERY_PROFILING)), 200
+
     # Root endpoint with API info
     @app.route("/", methods=["GET"])
     def index():
@@ -95,6 +142,8 @@ def create_app():
             "environment": Config.ENV,
             "endpoints": {
                 "health": "/health",
+                "metrics": "/metrics",
+                "query_metrics": "/metrics/queries",
                 "auth": "/auth/register, /auth/login",
                 "properties": "/properties",
                 "likes": "/likes",
@@ -0,0 +1,64 @@
+"""
+Conditional GET support for the property read endpoints.
+
+Responses carry a strong ETag computed from the JSON body, so it changes
+whenever anything in the payload does, including like and view counts. Single
+property responses also carry Last-Modified from the property's updated_at,
+which every write moves, counter updates included. A request whose If-None-Match lists the
+current ETag, or that has no If-None-Match and an If-Modified-Since at or
+after Last-Modified, gets an empty 304 instead of the payload.
+"""
+import hashlib
+from datetime import datetime, timezone
+
+from flask import request
+from werkzeug.http import http_date, quote_etag
+
+from app.json_encoding import dumps
+
+
+def make_etag(result):
+    """Return the (unquoted) strong ETag for a JSON-serializable response body."""
+    return hashlib.sha1(dumps(result, sort_keys=True)).hexdigest()
+
+
+def _not_modified(etag, last_modified):
+    # If-None-Match takes precedence over If-Modified-Since and uses the weak
+    # comparison (RFC 9110 13.1.2, 13.2.2)
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def conditional_response(result, status, last_modified=None):
+    """Turn a (result, status) pair into a Flask-RESTful response with validators.
+
+    ``last_modified`` is a naive UTC datetime. Non-200 responses pass through
+    unchanged.
+    """
+    if status != 200:
+        return result, status
+
+    etag = make_etag(result)
+    headers = {"ETag": quote_etag(etag), "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        # HTTP dates have one-second resolution
+        last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+        headers["Last-Modified"] = http_date(last_modified)
+
+    if _not_modified(etag, last_modified):
+        return "", 304, headers
+    return result, status, headers
+
+
+def property_last_modified(result):
+    """Read updated_at from a single property response, if present."""
+    updated_at = (result.get("property") or {}).get("updated_at")
+    if not updated_at:
+        return None
+    try:
+        return datetime.fromisoformat(updated_at)
+    except ValueError:
+        return None
@@ -30,6 +30,11 @@ class Config:
     # Database Configuration
     MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/real_estate")
     MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "real_estate")
+    MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 100))
+    MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 0))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 10000))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 0)) or None
 
     # JWT Configuration
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(days=7)
@@ -49,9 +54,52 @@ class Config:
     JSON_SORT_KEYS = False  # Don't sort JSON keys for performance
     JSONIFY_PRETTYPRINT_REGULAR = False  # Minimize JSON output in production
 
+    # Seconds a filtered listing count is reused when include_total=approx
+    PROPERTY_COUNT_CACHE_TTL = int(os.getenv("PROPERTY_COUNT_CACHE_TTL", 60))
+
+    # Seconds seller dashboard stats are served from cache
+    SELLER_DASHBOARD_CACHE_TTL = int(os.getenv("SELLER_DASHBOARD_CACHE_TTL", 10))
+
+    # Seconds a user's ranked recommendation feed is reused between pages
+    RECOMMENDATION_FEED_CACHE_TTL = int(os.getenv("RECOMMENDATION_FEED_CACHE_TTL", 300))
+
+    # Response cache for public property reads (see app/response_cache.py):
+    # "memory" (per process), "redis" (shared) or "none"
+    RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory").lower()
+    RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 30))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 2048))
+    RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+    # Property view write-behind buffer (see app/view_buffer.py).
+    # VIEW_BUFFER_MAX_PENDING views waiting trigger a flush; VIEW_BUFFER_MAX_LOSS
+    # is the most views a crashed process can lose, views over it are dropped.
+    VIEW_BUFFER_FLUSH_INTERVAL_MS = int(os.getenv("VIEW_BUFFER_FLUSH_INTERVAL_MS", 1000))
+    VIEW_BUFFER_MAX_PENDING = int(os.getenv("VIEW_BUFFER_MAX_PENDING", 100))
+    VIEW_BUFFER_MAX_LOSS = int(os.getenv("VIEW_BUFFER_MAX_LOSS", 1000))
+
+    # Per-request Mongo command profiling (see app/query_profiler.py): Server-Timing
+    # headers, slow request logging and per-route totals at /metrics/queries
+    QUERY_PROFILING = os.getenv("QUERY_PROFILING", "True").lower() == "true"
+    QUERY_PROFILE_SLOW_MS = int(os.getenv("QUERY_PROFILE_SLOW_MS", 500))
+    QUERY_PROFILE_MAX_COMMANDS = int(os.getenv("QUERY_PROFILE_MAX_COMMANDS", 20))
+
+    # Run explain() on every controller query shape at startup (see app/query_plans.py)
+    CHECK_QUERY_PLANS = os.getenv("CHECK_QUERY_PLANS", "False").lower() == "true"
+
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
+    @classmethod
+    def mongo_client_options(cls):
+        """Connection pool and timeout options shared by every Mongo client."""
+        return {
+            "maxPoolSize": cls.MONGO_MAX_POOL_SIZE,
+            "minPoolSize": cls.MONGO_MIN_POOL_SIZE,
+            "serverSelectionTimeoutMS": cls.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            "connectTimeoutMS": cls.MONGO_CONNECT_TIMEOUT_MS,
+            "socketTimeoutMS": cls.MONGO_SOCKET_TIMEOUT_MS,
+        }
+
     @classmethod
     def from_env(cls):
         """Load configuration from environment - useful for validation."""
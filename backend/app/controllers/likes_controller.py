@@ -1,11 +1,17 @@
 from app.models.user_model import User
 from app.models.property_model import Property
+from app.models.like_model import Like
+from app.serializers import parse_fields, project, serialize_property
+from app.config import Config
 from bson import ObjectId
+from datetime import datetime
+from mongoengine.errors import NotUniqueError
 import logging
+import time
 
-# Import direct recommendation service (no message queue)
+# Import recommendation job queue
 try:
-    from recommendation_worker import generate_recommendations_for_like
+    from recommendation_worker import enqueue_like_event, remove_recommendations_for_unlike
     recommendation_service_available = True
 except ImportError:
     recommendation_service_available = False
@@ -13,13 +19,24 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Ranked feed ids per user: {user_id: (ranked_ids, version, expires_at)}
+_feed_cache = {}
+FEED_CACHE_MAX_ENTRIES = 4096
+# Days for a recommendation's weight in the feed to halve
+FEED_RECENCY_HALF_LIFE_DAYS = 7
+
+
+def _user_exists(user_id):
+    """Check a user exists without loading the whole document."""
+    return User.objects(id=user_id).only('id').first() is not None
+
 
 def like_property(user_id, property_id):
-    """Add a property to user's liked list and generate recommendations directly."""
+    """Add a property to user's liked list and queue recommendation generation."""
     try:
-        user = User.objects(id=user_id).first()
-        if not user:
+        if not _user_exists(user_id):
             return {"message": "User not found"}, 404
+        user_oid = ObjectId(user_id)
         
         # Convert to ObjectId - property_id comes as string from URL
         try:
@@ -28,38 +45,44 @@ def like_property(user_id, property_id):
             return {"message": "Invalid property ID format"}, 400
         
         # Check if property exists
-        prop = Property.objects(id=prop_id).first()
+        prop = Property.objects(id=prop_id).only('title', 'property_type', 'location', 'price', 'geo').first()
         if not prop:
             return {"message": "Property not found"}, 404
         
-        # Add to liked properties if not already there
-        if prop_id not in user.liked_properties:
-            user.liked_properties.append(prop_id)
-            user.save()
-            
+        # Upsert the like; only a newly inserted like changes the count
+        try:
+            result = Like.objects(user_id=user_oid, property_id=prop_id).update_one(
+                upsert=True, set_on_insert__created_at=datetime.utcnow(), full_result=True
+            )
+            is_new_like = result.upserted_id is not None
+        except NotUniqueError:
+            # A concurrent request inserted the same like first
+            is_new_like = False
+        
+        if is_new_like:
             # Update property likes count
-            prop.likes_count = (getattr(prop, 'likes_count', 0) or 0) + 1
-            prop.save()
+            Property.adjust_counter(prop_id, 'likes_count', 1)
+            _invalidate_feed(user_id)
             
-            # Generate recommendations immediately after a successful like
+            # Queue recommendation generation; workers handle it off the request path
             if recommendation_service_available:
                 try:
-                    generate_recommendations_for_like({
+                    enqueue_like_event({
                         "user_id": str(user_id),
                         "property_id": str(prop_id),
                         "property_title": prop.title,
                         "property_type": prop.property_type,
                         "location": prop.location,
                         "price": prop.price,
+                        "geo": prop.geo,
                     })
-                    logger.info(f"Generated recommendations for property: {prop.title}")
                 except Exception as e:
-                    # Log error but don't fail the like operation if recommendation generation fails
-                    logger.error(f"Failed to generate recommendations: {str(e)}")
+                    # Log error but don't fail the like operation if queueing fails
+                    logger.error(f"Failed to queue recommendations: {str(e)}")
         
         return {
             "message": "Property added to interests",
-            "liked_count": len(user.liked_properties),
+            "liked_count": Like.objects(user_id=user_oid).count(),
             "property_id": str(prop_id),
         }, 200
     except Exception as e:
@@ -70,9 +93,9 @@ def like_property(user_id, property_id):
 def unlike_property(user_id, property_id):
     """Remove a property from user's liked list."""
     try:
-        user = User.objects(id=user_id).first()
-        if not user:
+        if not _user_exists(user_id):
             return {"message": "User not found"}, 404
+        user_oid = ObjectId(user_id)
         
         # Convert to ObjectId - property_id comes as string from URL
         try:
@@ -80,19 +103,21 @@ def unlike_property(user_id, property_id):
         except Exception:
             return {"message": "Invalid property ID format"}, 400
         
-        if prop_id in user.liked_properties:
-            user.liked_properties.remove(prop_id)
-            user.save()
-            
+        if Like.objects(user_id=user_oid, property_id=prop_id).delete():
             # Update property likes count
-            prop = Property.objects(id=prop_id).first()
-            if prop:
-                prop.likes_count = max(0, (getattr(prop, 'likes_count', 0) or 0) - 1)
-                prop.save()
+            Property.adjust_counter(prop_id, 'likes_count', -1)
+            _invalidate_feed(user_id)
+            
+            # Recommendations generated from this like no longer apply
+            if recommendation_service_available:
+                try:
+                    remove_recommendations_for_unlike(user_id, prop_id)
+                except Exception as e:
+                    logger.error(f"Failed to remove recommendations: {str(e)}")
         
         return {
             "message": "Property removed from interests",
-            "liked_count": len(user.liked_properties),
+            "liked_count": Like.objects(user_id=user_oid).count(),
             "property_id": str(prop_id),
         }, 200
     except Exception as e:
@@ -100,38 +125,47 @@ def unlike_property(user_id, property_id):
         return {"message": f"Error: {str(e)}"}, 500
 
 
-def get_user_liked_properties(user_id, page=1):
-    """Get all properties liked by a user with pagination."""
+def get_user_liked_properties(user_id, page=1, fields=None):
+    """Get all properties liked by a user with pagination, newest like first.
+
+    ``fields`` selects the returned property fields (see property_controller.parse_fields).
+    """
+    try:
+        fields = parse_fields(fields)
+    except ValueError as e:
+        return {"message": str(e)}, 400
+    
     try:
-        user = User.objects(id=user_id).first()
-        if not user:
+        if not _user_exists(user_id):
             return {"message": "User not found"}, 404
         
-        liked_ids = user.liked_properties
+        ITEMS_PER_PAGE = 12
+        likes = Like.objects(user_id=ObjectId(user_id))
+        total_count = likes.count()
         
-        if not liked_ids:
+        if not total_count:
             return {
                 "properties": [],
                 "pagination": {
                     "current_page": 1,
                     "total_pages": 0,
                     "total_items": 0,
-                    "items_per_page": 12,
+                    "items_per_page": ITEMS_PER_PAGE,
                 }
             }, 200
         
         # Get properties
-        ITEMS_PER_PAGE = 12
         skip = (page - 1) * ITEMS_PER_PAGE
-        
-        properties = Property.objects(id__in=liked_ids).skip(skip).limit(ITEMS_PER_PAGE)
-        total_count = len(liked_ids)
+        page_ids = list(likes.order_by('-created_at').skip(skip).limit(ITEMS_PER_PAGE).scalar('property_id'))
+        props_by_id = {
+            prop['_id']: prop for prop in project(Property.objects(id__in=page_ids), fields).as_pymongo()
+        }
         total_pages = (total_count + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE
         
-        from app.controllers.property_controller import _serialize_property
-        
         return {
-            "properties": [_serialize_property(p) for p in properties],
+            "properties": [
+                serialize_property(props_by_id[pid], fields) for pid in page_ids if pid in props_by_id
+            ],
             "pagination": {
                 "current_page": page,
                 "total_pages": total_pages,
@@ -146,11 +180,13 @@ def get_user_liked_properties(user_id, page=1):
 def check_liked_properties(user_id):
     """Get list of property IDs that user has liked."""
     try:
-        user = User.objects(id=user_id).first()
-        if not user:
+        if not _user_exists(user_id):
             return {"message": "User not found"}, 404
         
-        liked_ids = [str(pid) for pid in user.liked_properties]
+        liked_ids = [
+            str(pid) for pid in
+            Like.objects(user_id=ObjectId(user_id)).order_by('-created_at').scalar('property_id')
+        ]
         return {
             "liked_properties": liked_ids,
             "count": len(liked_ids),
@@ -185,28 +221,41 @@ def get_recommendations(user_id, page=1):
         skip = (page - 1) * ITEMS_PER_PAGE
         
         user_obj_id = BsonObjectId(user_id)
-        recommendations = Recommendation.objects(user_id=user_obj_id).skip(skip).limit(ITEMS_PER_PAGE)
+        recommendations = (
+            Recommendation.objects(user_id=user_obj_id)
+            .order_by('-updated_at')
+            .skip(skip)
+            .limit(ITEMS_PER_PAGE)
+        )
         total_count = Recommendation.objects(user_id=user_obj_id).count()
         total_pages = (total_count + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE
         
         # Build response with recommended property details
-        from app.controllers.property_controller import _serialize_property
+        recommendations = list(recommendations)
+        
+        # Fetch every recommended property on this page in one query
+        page_prop_ids = set()
+        for rec in recommendations:
+            for prop_id in rec.recommended_properties or []:
+                try:
+                    page_prop_ids.add(BsonObjectId(prop_id))
+                except Exception as e:
+                    logger.warning(f"Could not fetch property {prop_id}: {str(e)}")
+        
+        props_by_id = {}
+        if page_prop_ids:
+            props_by_id = {
+                str(prop['_id']): prop for prop in Property.objects(id__in=list(page_prop_ids)).as_pymongo()
+            }
         
         recommendations_list = []
         for rec in recommendations:
-            # Get the liked property details
-            liked_prop = Property.objects(id=rec.liked_property_id).first()
-            
             # Get the recommended properties
-            recommended_props = []
-            if rec.recommended_properties:
-                for prop_id in rec.recommended_properties:
-                    try:
-                        prop = Property.objects(id=BsonObjectId(prop_id)).first()
-                        if prop:
-                            recommended_props.append(_serialize_property(prop))
-                    except Exception as e:
-                        logger.warning(f"Could not fetch property {prop_id}: {str(e)}")
+            recommended_props = [
+                serialize_property(props_by_id[str(prop_id)])
+                for prop_id in rec.recommended_properties or []
+                if str(prop_id) in props_by_id
+            ]
             
             rec_dict = {
                 "id": str(rec.id),
@@ -235,3 +284,119 @@ def get_recommendations(user_id, page=1):
         import traceback
         traceback.print_exc()
         return {"message": f"Error: {str(e)}"}, 500
+
+
+def _invalidate_feed(user_id):
+    """Drop a user's cached feed after their likes change."""
+    _feed_cache.pop(str(user_id), None)
+
+
+def _rank_feed(recommendations, liked_ids, now):
+    """Merge recommendation lists into one ranked list of property id strings.
+
+    A candidate scores 1 / (1 + position) in every list it appears in, scaled
+    by how recently that list was refreshed, so properties recommended from
+    several recent likes rank first. Liked properties are left out.
+    """
+    scores = {}
+    for rec in recommendations:
+        updated_at = rec.get('updated_at') or rec.get('created_at') or now
+        age_days = max((now - updated_at).total_seconds(), 0) / 86400
+        recency = 0.5 ** (age_days / FEED_RECENCY_HALF_LIFE_DAYS)
+        for position, prop_id in enumerate(rec.get('recommended_properties') or []):
+            prop_id = str(prop_id)
+            if prop_id in liked_ids:
+                continue
+            scores[prop_id] = scores.get(prop_id, 0.0) + recency / (1 + position)
+    # sorted() is stable, so ties keep the order of the newest recommendation
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def _get_ranked_feed(user_oid):
+    """Return (ranked property ids, from_cache) for a user.
+
+    The cached list is keyed on the user's newest recommendation, so lists
+    stored by the recommendation workers after a like replace it on the next
+    request even before the TTL runs out.
+    """
+    from recommendation_worker import Recommendation
+
+    user_key = str(user_oid)
+    latest = (
+        Recommendation.objects(user_id=user_oid)
+        .order_by('-updated_at')
+        .only('updated_at')
+        .as_pymongo()
+        .first()
+    )
+    version = latest.get('updated_at') if latest else None
+
+    cached = _feed_cache.get(user_key)
+    if cached and cached[1] == version and cached[2] > time.monotonic():
+        return cached[0], True
+
+    recommendations = list(
+        Recommendation.objects(user_id=user_oid)
+        .order_by('-updated_at')
+        .only('recommended_properties', 'updated_at', 'created_at')
+        .as_pymongo()
+    )
+    liked_ids = {str(pid) for pid in Like.objects(user_id=user_oid).scalar('property_id')}
+    ranked = _rank_feed(recommendations, liked_ids, datetime.utcnow())
+
+    if len(_feed_cache) >= FEED_CACHE_MAX_ENTRIES:
+        # Drop the oldest entry; dicts keep insertion order
+        _feed_cache.pop(next(iter(_feed_cache)), None)
+    _feed_cache[user_key] = (ranked, version, time.monotonic() + Config.RECOMMENDATION_FEED_CACHE_TTL)
+    return ranked, False
+
+
+def get_recommendation_feed(user_id, page=1):
+    """Get one ranked, de-duplicated list of recommended properties for a user.
+
+    Candidates from every liked property are merged, already-liked properties
+    removed and the ranked ids cached per user, so each page is a slice of the
+    cached list plus one query for that page's properties.
+    """
+    ITEMS_PER_PAGE = 12
+    try:
+        try:
+            from recommendation_worker import Recommendation  # noqa: F401
+        except ImportError:
+            return {
+                "properties": [],
+                "message": "Recommendation system not available",
+                "pagination": {
+                    "current_page": 1,
+                    "total_pages": 0,
+                    "total_items": 0,
+                    "items_per_page": ITEMS_PER_PAGE,
+                }
+            }, 200
+        
+        ranked, cached = _get_ranked_feed(ObjectId(user_id))
+        total_count = len(ranked)
+        total_pages = (total_count + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE
+        skip = (page - 1) * ITEMS_PER_PAGE
+        page_ids = ranked[skip:skip + ITEMS_PER_PAGE]
+        
+        props_by_id = {}
+        if page_ids:
+            props_by_id = {
+                str(prop['_id']): prop
+                for prop in Property.objects(id__in=[ObjectId(pid) for pid in page_ids]).as_pymongo()
+            }
+        
+        return {
+            "properties": [serialize_property(props_by_id[pid]) for pid in page_ids if pid in props_by_id],
+            "cached": cached,
+            "pagination": {
+                "current_page": page,
+                "total_pages": total_pages,
+                "total_items": total_count,
+                "items_per_page": ITEMS_PER_PAGE,
+            }
+        }, 200
+    except Exception as e:
+        logger.error(f"Get recommendation feed error: {str(e)}")
+        return {"message": f"Error: {str(e)}"}, 500
@@ -1,51 +1,80 @@
 from app.models.property_model import Property
+from app.config import Config
+from app.response_cache import invalidate_property_responses
+from app.serializers import parse_fields, project, serialize_property
+from app.geo import geo_point, geo_point_from_data, parse_coordinates
+from app.property_bulk import detect_format, export_properties, import_properties
+from bson import ObjectId
+from mongoengine.queryset.visitor import Q
 from datetime import datetime
+import base64
+import json
+import time
 
 
 ITEMS_PER_PAGE = 12
 
+# Listing order; `id` breaks ties so keyset cursors are stable.
+LISTING_ORDER = ('-featured', '-posted_date', '-id')
 
-def _serialize_property(prop):
-    """Convert Property document to JSON-serializable dict."""
-    # Handle both updated_at and updated_date field names for backward compatibility
-    updated_field = getattr(prop, 'updated_at', None) or getattr(prop, 'updated_date', None)
-    
-    return {
-        "id": str(prop.id),
-        "title": prop.title,
-        "description": prop.description,
-        "location": prop.location,
-        "city": prop.city,
-        "property_type": prop.property_type,
-        "price": prop.price,
-        "area": prop.area,
-        "bedrooms": prop.bedrooms,
-        "bathrooms": prop.bathrooms,
-        "image": prop.image,
-        "images": getattr(prop, 'images', []) or [],
-        "amenities": prop.amenities,
-        "featured": prop.featured,
-        "verified": prop.verified,
-        "available": prop.available,
-        "status": getattr(prop, 'status', 'Active'),
-        "likes_count": getattr(prop, 'likes_count', 0),
-        "interests_count": getattr(prop, 'interests_count', 0),
-        "visits_count": getattr(prop, 'visits_count', 0),
-        "views_count": getattr(prop, 'views_count', 0),
-        "seller_id": str(prop.seller_id) if getattr(prop, 'seller_id', None) else None,
-        "seller_name": getattr(prop, 'seller_name', None),
-        "seller_email": getattr(prop, 'seller_email', None),
-        "seller_phone": getattr(prop, 'seller_phone', None),
-        "posted_date": prop.posted_date.isoformat() if prop.posted_date else None,
+# Accepted values for the include_total listing parameter
+TOTAL_MODES = ('exact', 'approx', 'false')
+
+# Upper bounds of the price facet buckets; prices above the last one fall in "50000000+"
+PRICE_BUCKETS = (0, 2500000, 5000000, 10000000, 20000000, 50000000)
+
+# /properties/nearby search radius in kilometres
+NEARBY_DEFAULT_RADIUS_KM = 5
+NEARBY_MAX_RADIUS_KM = 50
+
+# Cached listing counts keyed by filter signature: {signature: (count, expires_at)}
+_count_cache = {}
+COUNT_CACHE_MAX_ENTRIES = 1024
+
+
+def _encode_cursor(doc):
+    """Encode the sort key of the last raw document on a page as an opaque cursor."""
+    posted_date = doc.get("posted_date")
+    payload = {
+        "f": bool(doc.get("featured")),
+        "d": posted_date.isoformat() if posted_date else None,
+        "id": str(doc["_id"]),
     }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
 
 
-def get_all_properties(page=1, city=None, property_type=None, min_price=None, max_price=None):
-    """Get paginated properties with optional filters."""
-    page = max(1, int(page))
-    skip = (page - 1) * ITEMS_PER_PAGE
-    
-    # Build filter query
+def _decode_cursor(cursor):
+    """Decode a cursor into (featured, posted_date, id). Raises ValueError."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        posted_date = datetime.fromisoformat(payload["d"]) if payload["d"] else None
+        return bool(payload["f"]), posted_date, ObjectId(payload["id"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def _after_cursor(featured, posted_date, prop_id):
+    """Build the keyset filter for items sorted after the cursor position."""
+    same_featured = Q(featured=featured)
+    if posted_date is None:
+        # Documents without a posted_date sort last within their featured group
+        after_in_group = Q(posted_date=None, id__lt=prop_id)
+    else:
+        after_in_group = (
+            Q(posted_date__lt=posted_date)
+            | Q(posted_date=None)
+            | Q(posted_date=posted_date, id__lt=prop_id)
+        )
+    condition = same_featured & after_in_group
+    if featured:
+        condition = condition | Q(featured__ne=True)
+    return condition
+
+
+def _build_property_query(city=None, property_type=None, min_price=None, max_price=None):
+    """Build the filtered Property queryset used by the listing endpoints."""
     query = Property.objects()
     
     if city:
@@ -60,37 +89,307 @@ def get_all_properties(page=1, city=None, property_type=None, min_price=None, ma
     if max_price is not None:
         query = query(price__lte=int(max_price))
     
-    # Get total count
-    total_count = query.count()
-    total_pages = (total_count + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE
+    return query
+
+
+def _filter_signature(city, property_type, min_price, max_price):
+    """Return a hashable key describing the listing filters."""
+    return (city or None, property_type or None, min_price, max_price)
+
+
+def _count_properties(query, signature, mode):
+    """Count listing results according to ``mode``.
+
+    Returns ``(total, is_estimate)``; ``total`` is None when counting is skipped.
+    ``approx`` uses the collection metadata count for unfiltered listings and a
+    short-lived cached count per filter signature otherwise.
+    """
+    if mode == 'false':
+        return None, False
+    
+    if mode == 'approx':
+        if not any(value is not None for value in signature):
+            return Property._get_collection().estimated_document_count(), True
+        
+        cached = _count_cache.get(signature)
+        if cached and cached[1] > time.monotonic():
+            return cached[0], True
     
-    # Get paginated results, sorted by featured first, then by posted date
-    properties = query.order_by('-featured', '-posted_date').skip(skip).limit(ITEMS_PER_PAGE)
+    total = query.count()
+    
+    if len(_count_cache) >= COUNT_CACHE_MAX_ENTRIES:
+        # Drop the oldest entry; dicts keep insertion order
+        _count_cache.pop(next(iter(_count_cache)), None)
+    _count_cache[signature] = (total, time.monotonic() + Config.PROPERTY_COUNT_CACHE_TTL)
+    
+    return total, False
+
+
+def get_all_properties(page=1, city=None, property_type=None, min_price=None, max_price=None,
+                       cursor=None, include_total=None, fields=None):
+    """Get paginated properties with optional filters.
+
+    Passing ``cursor`` (an empty string for the first page) switches to keyset
+    pagination: results continue after the cursor position and the response
+    carries a ``next_cursor`` instead of page numbers, so deep pages cost the
+    same as the first one.
+
+    ``include_total`` is one of ``exact``, ``approx`` or ``false`` and controls
+    how the total item count is computed. Page mode defaults to ``exact`` and
+    cursor mode to ``false``.
+
+    ``fields`` selects the returned fields; see parse_fields().
+    """
+    try:
+        fields = parse_fields(fields)
+    except ValueError as e:
+        return {"message": str(e)}, 400
+    
+    if include_total is None:
+        include_total = 'false' if cursor is not None else 'exact'
+    include_total = str(include_total).lower()
+    if include_total not in TOTAL_MODES:
+        return {"message": f"Invalid include_total. Must be one of: {list(TOTAL_MODES)}"}, 400
+    
+    query = _build_property_query(city, property_type, min_price, max_price)
+    signature = _filter_signature(city, property_type, min_price, max_price)
+    
+    if cursor is not None:
+        return _get_properties_after_cursor(query, cursor, signature, include_total, fields)
+    
+    page = max(1, int(page))
+    skip = (page - 1) * ITEMS_PER_PAGE
+    
+    # Get paginated results, sorted by featured first, then by posted date.
+    # One extra item tells us whether another page exists without a count.
+    properties = list(
+        project(query, fields).order_by(*LISTING_ORDER).skip(skip).limit(ITEMS_PER_PAGE + 1).as_pymongo()
+    )
+    has_more = len(properties) > ITEMS_PER_PAGE
+    properties = properties[:ITEMS_PER_PAGE]
+    
+    total_count, is_estimate = _count_properties(query, signature, include_total)
+    total_pages = (
+        (total_count + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE
+        if total_count is not None else None
+    )
     
     return {
-        "properties": [_serialize_property(p) for p in properties],
+        "properties": [serialize_property(p, fields) for p in properties],
         "pagination": {
             "current_page": page,
             "total_pages": total_pages,
             "total_items": total_count,
+            "total_is_estimate": is_estimate,
+            "has_more": has_more,
             "items_per_page": ITEMS_PER_PAGE,
         }
+    }, 200
+
+
+def _get_properties_after_cursor(query, cursor, signature, include_total, fields=None):
+    """Fetch one keyset page of properties following ``cursor``."""
+    page_query = query
+    if cursor:
+        try:
+            featured, posted_date, prop_id = _decode_cursor(cursor)
+        except ValueError as e:
+            return {"message": str(e)}, 400
+        page_query = query.filter(_after_cursor(featured, posted_date, prop_id))
+    
+    # Fetch one extra item to know whether another page exists
+    # The cursor is built from the sort key, so it is always loaded
+    page_query = project(page_query, fields, 'featured', 'posted_date')
+    properties = list(page_query.order_by(*LISTING_ORDER).limit(ITEMS_PER_PAGE + 1).as_pymongo())
+    has_more = len(properties) > ITEMS_PER_PAGE
+    properties = properties[:ITEMS_PER_PAGE]
+    
+    pagination = {
+        "next_cursor": _encode_cursor(properties[-1]) if has_more else None,
+        "has_more": has_more,
+        "items_per_page": ITEMS_PER_PAGE,
     }
+    
+    # The total describes the whole filtered listing, not what is left after the cursor
+    total_count, is_estimate = _count_properties(query, signature, include_total)
+    if total_count is not None:
+        pagination["total_items"] = total_count
+        pagination["total_is_estimate"] = is_estimate
+    
+    return {
+        "properties": [serialize_property(p, fields) for p in properties],
+        "pagination": pagination,
+    }, 200
+
+
+def get_featured_properties(limit=6, fields=None):
+    """Get featured properties.
+
+    ``fields`` selects the returned fields; raises ValueError for unknown names.
+    """
+    fields = parse_fields(fields)
+    properties = project(
+        Property.objects(featured=True, available=True), fields
+    ).order_by('-posted_date').limit(limit).as_pymongo()
+    return [serialize_property(p, fields) for p in properties]
+
 
+def _count_facet(field):
+    """Facet stages counting results per value of ``field``, most common first."""
+    return [
+        {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1, "_id": 1}},
+    ]
 
-def get_featured_properties(limit=6):
-    """Get featured properties."""
-    properties = Property.objects(featured=True, available=True).order_by('-posted_date').limit(limit)
-    return [_serialize_property(p) for p in properties]
+
+def _price_bucket_label(lower):
+    if lower == 'other':
+        return f"{PRICE_BUCKETS[-1]}+"
+    upper = PRICE_BUCKETS[PRICE_BUCKETS.index(lower) + 1]
+    return f"{lower}-{upper}"
+
+
+def search_properties(q=None, city=None, property_type=None, min_price=None, max_price=None,
+                      min_bedrooms=None, min_area=None, max_area=None, amenities=None,
+                      page=1, fields=None):
+    """Search properties by keyword and filters, with facet counts.
+
+    ``q`` is matched against title, location, amenities and description through
+    the text index and results are ranked by relevance; without ``q`` they use
+    the listing order. ``amenities`` is a comma-separated list that every
+    result must include. Results, the total and the city, type and price facets
+    of the filtered set come from a single aggregation.
+    """
+    try:
+        fields = parse_fields(fields)
+    except ValueError as e:
+        return {"message": str(e)}, 400
+    
+    page = max(1, int(page))
+    query = _build_property_query(city, property_type, min_price, max_price)
+    if min_bedrooms is not None:
+        query = query(bedrooms__gte=int(min_bedrooms))
+    if min_area is not None:
+        query = query(area__gte=int(min_area))
+    if max_area is not None:
+        query = query(area__lte=int(max_area))
+    amenity_list = [a.strip() for a in (amenities or "").split(",") if a.strip()]
+    if amenity_list:
+        query = query(amenities__all=amenity_list)
+    if q and q.strip():
+        query = query.search_text(q.strip())
+        sort = {"score": {"$meta": "textScore"}, "featured": -1, "posted_date": -1, "_id": -1}
+    else:
+        sort = {"featured": -1, "posted_date": -1, "_id": -1}
+    
+    results = [
+        {"$sort": sort},
+        {"$skip": (page - 1) * ITEMS_PER_PAGE},
+        {"$limit": ITEMS_PER_PAGE},
+    ]
+    if fields is not None:
+        results.append({"$project": {name: 1 for name in fields if name != "id"}})
+    
+    try:
+        facets = next(query.aggregate([{"$facet": {
+            "results": results,
+            "total": [{"$count": "count"}],
+            "city": _count_facet("city"),
+            "property_type": _count_facet("property_type"),
+            "price": [{"$bucket": {
+                "groupBy": "$price",
+                "boundaries": list(PRICE_BUCKETS),
+                "default": "other",
+            }}],
+        }}]), {})
+    except Exception as e:
+        return {"message": f"Error searching properties: {str(e)}"}, 400
+    
+    total_count = facets["total"][0]["count"] if facets.get("total") else 0
+    return {
+        "properties": [serialize_property(doc, fields) for doc in facets.get("results", [])],
+        "facets": {
+            "city": [{"value": row["_id"], "count": row["count"]} for row in facets.get("city", [])],
+            "property_type": [
+                {"value": row["_id"], "count": row["count"]} for row in facets.get("property_type", [])
+            ],
+            "price": [
+                {"value": _price_bucket_label(row["_id"]), "count": row["count"]}
+                for row in facets.get("price", [])
+            ],
+        },
+        "pagination": {
+            "current_page": page,
+            "total_pages": (total_count + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE,
+            "total_items": total_count,
+            "items_per_page": ITEMS_PER_PAGE,
+        }
+    }, 200
+
+
+def get_nearby_properties(lat, lng, radius_km=None, city=None, property_type=None,
+                          min_price=None, max_price=None, page=1, fields=None):
+    """Get properties within ``radius_km`` of a point, nearest first.
+
+    Uses $geoNear on the 2dsphere index, so only properties with coordinates
+    are returned. Each result carries its ``distance_km`` from the point.
+    """
+    try:
+        lat, lng = parse_coordinates(lat, lng)
+        fields = parse_fields(fields)
+    except (TypeError, ValueError) as e:
+        return {"message": str(e)}, 400
+    
+    radius_km = NEARBY_DEFAULT_RADIUS_KM if radius_km is None else float(radius_km)
+    if not 0 < radius_km <= NEARBY_MAX_RADIUS_KM:
+        return {"message": f"radius must be between 0 and {NEARBY_MAX_RADIUS_KM} km"}, 400
+    
+    page = max(1, int(page))
+    query = _build_property_query(city, property_type, min_price, max_price)
+    pipeline = [
+        {"$geoNear": {
+            "near": geo_point(lat, lng),
+            "distanceField": "distance_m",
+            "maxDistance": radius_km * 1000,
+            "spherical": True,
+            "query": query._query,
+        }},
+        {"$skip": (page - 1) * ITEMS_PER_PAGE},
+        # One extra item tells us whether another page exists
+        {"$limit": ITEMS_PER_PAGE + 1},
+    ]
+    if fields is not None:
+        pipeline.append({"$project": dict({name: 1 for name in fields if name != "id"}, distance_m=1)})
+    
+    try:
+        docs = list(Property._get_collection().aggregate(pipeline))
+    except Exception as e:
+        return {"message": f"Error finding nearby properties: {str(e)}"}, 400
+    
+    has_more = len(docs) > ITEMS_PER_PAGE
+    properties = []
+    for doc in docs[:ITEMS_PER_PAGE]:
+        item = serialize_property(doc, fields)
+        item["distance_km"] = round(doc["distance_m"] / 1000, 3)
+        properties.append(item)
+    
+    return {
+        "properties": properties,
+        "pagination": {
+            "current_page": page,
+            "has_more": has_more,
+            "items_per_page": ITEMS_PER_PAGE,
+        }
+    }, 200
 
 
 def get_property_by_id(property_id):
     """Get a single property by ID."""
     try:
-        prop = Property.objects(id=property_id).first()
+        prop = Property.objects(id=property_id).as_pymongo().first()
         if not prop:
             return {"message": "Property not found"}, 404
-        return {"property": _serialize_property(prop)}, 200
+        return {"property": serialize_property(prop)}, 200
     except Exception as e:
         return {"message": str(e)}, 400
 
@@ -116,14 +415,16 @@ def create_property(data):
             bathrooms=int(data["bathrooms"]),
             image=data["image"].strip(),
             amenities=data.get("amenities", []),
+            geo=geo_point_from_data(data),
             featured=data.get("featured", False),
             verified=data.get("verified", False),
         )
         prop.save()
+        invalidate_property_responses()
         
         return {
             "message": "Property created successfully",
-            "property": _serialize_property(prop),
+            "property": serialize_property(prop),
         }, 201
     except Exception as e:
         return {"message": f"Error creating property: {str(e)}"}, 400
@@ -148,16 +449,17 @@ def update_property(property_id, data):
         prop.bathrooms = int(data.get("bathrooms", prop.bathrooms))
         prop.image = data.get("image", prop.image).strip()
         prop.amenities = data.get("amenities", prop.amenities)
+        if "latitude" in data or "longitude" in data:
+            prop.geo = geo_point_from_data(data)
         prop.featured = data.get("featured", prop.featured)
         prop.verified = data.get("verified", prop.verified)
         prop.available = data.get("available", prop.available)
-        prop.updated_date = datetime.utcnow()
-        
         prop.save()
+        invalidate_property_responses()
         
         return {
             "message": "Property updated successfully",
-            "property": _serialize_property(prop),
+            "property": serialize_property(prop),
         }, 200
     except Exception as e:
         return {"message": f"Error updating property: {str(e)}"}, 400
@@ -171,6 +473,37 @@ def delete_property(property_id):
             return {"message": "Property not found"}, 404
         
         prop.delete()
+        invalidate_property_responses()
         return {"message": "Property deleted successfully"}, 200
     except Exception as e:
         return {"message": f"Error deleting property: {str(e)}"}, 400
+
+
+def import_properties_from_stream(stream, fmt=None, content_type=None, filename=None, upsert=False):
+    """Bulk import listings from a CSV or NDJSON stream (Admin only).
+
+    Rows with an unknown id fail unless ``upsert`` is set.
+    """
+    try:
+        fmt = detect_format(fmt, content_type, filename)
+    except ValueError as e:
+        return {"message": str(e)}, 400
+    
+    try:
+        report = import_properties(stream, fmt, upsert=upsert)
+    except Exception as e:
+        return {"message": f"Error importing properties: {str(e)}"}, 400
+    finally:
+        # Rows written before a failure are visible too
+        invalidate_property_responses()
+    
+    return dict(report.as_dict(), message="Import finished"), 200
+
+
+def export_all_properties(fmt=None, city=None, property_type=None):
+    """Stream every listing as CSV or NDJSON (Admin only).
+
+    Returns (chunk generator, format). Raises ValueError for unknown formats.
+    """
+    fmt = detect_format(fmt)
+    return export_properties(_build_property_query(city, property_type), fmt), fmt
@@ -1,37 +1,19 @@
 from app.models.property_model import Property, ScheduledVisit, PropertyInterest
 from app.models.user_model import User
+from app.config import Config
+from app.view_buffer import view_buffer
+from app.response_cache import invalidate_property_responses
+from app.serializers import serialize_property
+from app.geo import geo_point_from_data
+from app.property_bulk import detect_format, export_properties, import_properties
 from bson import ObjectId
 from datetime import datetime
+import time
 
 
-def _serialize_property(prop):
-    """Convert Property document to JSON-serializable dict."""
-    return {
-        "id": str(prop.id),
-        "title": prop.title,
-        "description": prop.description,
-        "location": prop.location,
-        "city": prop.city,
-        "property_type": prop.property_type,
-        "price": prop.price,
-        "area": prop.area,
-        "bedrooms": prop.bedrooms,
-        "bathrooms": prop.bathrooms,
-        "image": prop.image,
-        "images": prop.images if hasattr(prop, 'images') and prop.images else [],
-        "amenities": prop.amenities,
-        "featured": prop.featured,
-        "verified": prop.verified,
-        "available": prop.available,
-        "status": prop.status if hasattr(prop, 'status') else 'Active',
-        "likes_count": prop.likes_count if hasattr(prop, 'likes_count') else 0,
-        "interests_count": prop.interests_count if hasattr(prop, 'interests_count') else 0,
-        "visits_count": prop.visits_count if hasattr(prop, 'visits_count') else 0,
-        "views_count": prop.views_count if hasattr(prop, 'views_count') else 0,
-        "seller_id": str(prop.seller_id) if prop.seller_id else None,
-        "seller_name": prop.seller_name if hasattr(prop, 'seller_name') else None,
-        "posted_date": prop.posted_date.isoformat() if prop.posted_date else None,
-    }
+# Cached dashboard stats keyed by seller id: {seller_id: (stats, expires_at)}
+_dashboard_cache = {}
+DASHBOARD_CACHE_MAX_ENTRIES = 4096
 
 
 def _serialize_visit(visit):
@@ -73,6 +55,30 @@ def _serialize_interest(interest):
     }
 
 
+def _property_summaries(property_ids):
+    """Fetch title, image and location for many properties in one query.
+
+    Returns a dict mapping property id string to its Property document.
+    """
+    ids = {pid for pid in property_ids if pid}
+    if not ids:
+        return {}
+    props = Property.objects(id__in=list(ids)).only('title', 'image', 'location')
+    return {str(prop.id): prop for prop in props}
+
+
+def _attach_property_summaries(items, serialized):
+    """Add property title, image and location to serialized visits/interests."""
+    summaries = _property_summaries(item.property_id for item in items)
+    for item, data in zip(items, serialized):
+        prop = summaries.get(str(item.property_id))
+        if prop:
+            data["property_title"] = prop.title
+            data["property_image"] = prop.image
+            data["property_location"] = prop.location
+    return serialized
+
+
 # ===== SELLER PROPERTY MANAGEMENT =====
 
 def create_seller_property(seller_id, data):
@@ -102,6 +108,7 @@ def create_seller_property(seller_id, data):
             image=data["image"].strip(),
             images=data.get("images", []),  # Additional images
             amenities=data.get("amenities", []),
+            geo=geo_point_from_data(data),
             seller_id=ObjectId(seller_id),
             seller_name=seller.name,
             seller_email=seller.email,
@@ -111,10 +118,12 @@ def create_seller_property(seller_id, data):
             status='Active',
         )
         prop.save()
+        _invalidate_dashboard(seller_id)
+        invalidate_property_responses()
         
         return {
             "message": "Property listed successfully",
-            "property": _serialize_property(prop),
+            "property": serialize_property(prop),
         }, 201
     except Exception as e:
         return {"message": f"Error creating property: {str(e)}"}, 400
@@ -123,10 +132,12 @@ def create_seller_property(seller_id, data):
 def get_seller_properties(seller_id):
     """Get all properties listed by a seller."""
     try:
-        properties = Property.objects(seller_id=ObjectId(seller_id)).order_by('-posted_date')
+        properties = list(
+            Property.objects(seller_id=ObjectId(seller_id)).order_by('-posted_date').as_pymongo()
+        )
         return {
-            "properties": [_serialize_property(p) for p in properties],
-            "count": properties.count()
+            "properties": [serialize_property(p) for p in properties],
+            "count": len(properties)
         }, 200
     except Exception as e:
         return {"message": f"Error fetching properties: {str(e)}"}, 400
@@ -164,6 +175,8 @@ def update_seller_property(seller_id, property_id, data):
             prop.images = data["images"]
         if "amenities" in data:
             prop.amenities = data["amenities"]
+        if "latitude" in data or "longitude" in data:
+            prop.geo = geo_point_from_data(data)
         if "available" in data:
             prop.available = data["available"]
         if "status" in data:
@@ -171,12 +184,13 @@ def update_seller_property(seller_id, property_id, data):
         if "seller_phone" in data:
             prop.seller_phone = data["seller_phone"]
             
-        prop.updated_date = datetime.utcnow()
         prop.save()
+        _invalidate_dashboard(seller_id)
+        invalidate_property_responses()
         
         return {
             "message": "Property updated successfully",
-            "property": _serialize_property(prop),
+            "property": serialize_property(prop),
         }, 200
     except Exception as e:
         return {"message": f"Error updating property: {str(e)}"}, 400
@@ -194,49 +208,114 @@ def delete_seller_property(seller_id, property_id):
         PropertyInterest.objects(property_id=ObjectId(property_id)).delete()
         
         prop.delete()
+        _invalidate_dashboard(seller_id)
+        invalidate_property_responses()
         return {"message": "Property deleted successfully"}, 200
     except Exception as e:
         return {"message": f"Error deleting property: {str(e)}"}, 400
 
 
+def import_seller_properties(seller_id, stream, fmt=None, content_type=None, filename=None):
+    """Bulk import a seller's listings from a CSV or NDJSON stream."""
+    try:
+        fmt = detect_format(fmt, content_type, filename)
+    except ValueError as e:
+        return {"message": str(e)}, 400
+    
+    seller = User.objects(id=seller_id).only('name', 'email').first()
+    if not seller:
+        return {"message": "Seller not found"}, 404
+    
+    try:
+        report = import_properties(stream, fmt, seller={
+            "seller_id": seller.id,
+            "seller_name": seller.name,
+            "seller_email": seller.email,
+        })
+    except Exception as e:
+        return {"message": f"Error importing properties: {str(e)}"}, 400
+    finally:
+        _invalidate_dashboard(seller_id)
+        invalidate_property_responses()
+    
+    return dict(report.as_dict(), message="Import finished"), 200
+
+
+def export_seller_properties(seller_id, fmt=None):
+    """Stream a seller's listings as CSV or NDJSON.
+
+    Returns (chunk generator, format). Raises ValueError for unknown formats.
+    """
+    fmt = detect_format(fmt)
+    return export_properties(Property.objects(seller_id=ObjectId(seller_id)), fmt), fmt
+
+
 # ===== SELLER DASHBOARD & INSIGHTS =====
 
-def get_seller_dashboard_stats(seller_id):
-    """Get dashboard statistics for a seller."""
+def _count_by_status(queryset):
+    """Return ({status: count}, total) for a queryset in one aggregation."""
+    counts = {
+        row["_id"]: row["count"]
+        for row in queryset.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}])
+    }
+    return counts, sum(counts.values())
+
+
+def _compute_seller_dashboard_stats(seller_oid):
+    """Compute dashboard stats with one aggregation per collection."""
+    property_totals = next(Property.objects(seller_id=seller_oid).aggregate([
+        {"$group": {
+            "_id": None,
+            "total_properties": {"$sum": 1},
+            "active_properties": {"$sum": {"$cond": [{"$eq": ["$status", "Active"]}, 1, 0]}},
+            "total_likes": {"$sum": {"$ifNull": ["$likes_count", 0]}},
+            "total_views": {"$sum": {"$ifNull": ["$views_count", 0]}},
+        }},
+    ]), {})
+    
+    interests_by_status, total_interests = _count_by_status(PropertyInterest.objects(seller_id=seller_oid))
+    visits_by_status, total_visits = _count_by_status(ScheduledVisit.objects(seller_id=seller_oid))
+    
+    return {
+        "total_properties": property_totals.get("total_properties", 0),
+        "active_properties": property_totals.get("active_properties", 0),
+        "total_likes": property_totals.get("total_likes", 0),
+        "total_views": property_totals.get("total_views", 0),
+        "total_interests": total_interests,
+        "new_interests": interests_by_status.get("New", 0),
+        "total_visits": total_visits,
+        "pending_visits": visits_by_status.get("Pending", 0),
+        "confirmed_visits": visits_by_status.get("Confirmed", 0),
+    }
+
+
+def _invalidate_dashboard(seller_id):
+    """Drop a seller's cached dashboard stats after one of their own writes."""
+    if seller_id:
+        _dashboard_cache.pop(str(seller_id), None)
+
+
+def get_seller_dashboard_stats(seller_id, fresh=False):
+    """Get dashboard statistics for a seller.
+
+    Stats are cached per seller for SELLER_DASHBOARD_CACHE_TTL seconds;
+    pass ``fresh=True`` to recompute them.
+    """
     try:
         seller_oid = ObjectId(seller_id)
         
-        # Count properties
-        total_properties = Property.objects(seller_id=seller_oid).count()
-        active_properties = Property.objects(seller_id=seller_oid, status='Active').count()
-        
-        # Calculate total likes across all seller's properties
-        properties = Property.objects(seller_id=seller_oid)
-        total_likes = sum(p.likes_count if hasattr(p, 'likes_count') else 0 for p in properties)
-        total_views = sum(p.views_count if hasattr(p, 'views_count') else 0 for p in properties)
+        cached = _dashboard_cache.get(seller_id)
+        if not fresh and cached and cached[1] > time.monotonic():
+            return {"stats": cached[0], "cached": True}, 200
         
-        # Count interests
-        total_interests = PropertyInterest.objects(seller_id=seller_oid).count()
-        new_interests = PropertyInterest.objects(seller_id=seller_oid, status='New').count()
+        stats = _compute_seller_dashboard_stats(seller_oid)
         
-        # Count scheduled visits
-        total_visits = ScheduledVisit.objects(seller_id=seller_oid).count()
-        pending_visits = ScheduledVisit.objects(seller_id=seller_oid, status='Pending').count()
-        confirmed_visits = ScheduledVisit.objects(seller_id=seller_oid, status='Confirmed').count()
+        if len(_dashboard_cache) >= DASHBOARD_CACHE_MAX_ENTRIES:
+            # Drop the oldest entry; dicts keep insertion order
+            _dashboard_cache.pop(next(iter(_dashboard_cache)), None)
+        _dashboard_cache[seller_id] = (stats, time.monotonic() + Config.SELLER_DASHBOARD_CACHE_TTL)
         
-        return {
-            "stats": {
-                "total_properties": total_properties,
-                "active_properties": active_properties,
-                "total_likes": total_likes,
-                "total_views": total_views,
-                "total_interests": total_interests,
-                "new_interests": new_interests,
-                "total_visits": total_visits,
-                "pending_visits": pending_visits,
-                "confirmed_visits": confirmed_visits,
-            }
-        }, 200
+        return {"stats": stats, "cached": False}, 200
     except Exception as e:
         return {"message": f"Error fetching stats: {str(e)}"}, 400
 
@@ -247,10 +326,15 @@ def get_seller_recent_activity(seller_id, limit=10):
         seller_oid = ObjectId(seller_id)
         activities = []
         
-        # Get recent interests
-        interests = PropertyInterest.objects(seller_id=seller_oid).order_by('-created_at').limit(limit)
+        # Get recent interests and visits
+        interests = list(PropertyInterest.objects(seller_id=seller_oid).order_by('-created_at').limit(limit))
+        visits = list(ScheduledVisit.objects(seller_id=seller_oid).order_by('-created_at').limit(limit))
+        summaries = _property_summaries(
+            [interest.property_id for interest in interests] + [visit.property_id for visit in visits]
+        )
+        
         for interest in interests:
-            prop = Property.objects(id=interest.property_id).first()
+            prop = summaries.get(str(interest.property_id))
             activities.append({
                 "type": "interest",
                 "user_name": interest.user_name,
@@ -260,10 +344,8 @@ def get_seller_recent_activity(seller_id, limit=10):
                 "message": interest.message,
             })
         
-        # Get recent scheduled visits
-        visits = ScheduledVisit.objects(seller_id=seller_oid).order_by('-created_at').limit(limit)
         for visit in visits:
-            prop = Property.objects(id=visit.property_id).first()
+            prop = summaries.get(str(visit.property_id))
             activities.append({
                 "type": "visit",
                 "user_name": visit.visitor_name,
@@ -322,8 +404,7 @@ def schedule_visit(user_id, property_id, data):
         visit.save()
         
         # Update property visits count
-        prop.visits_count = (prop.visits_count or 0) + 1
-        prop.save()
+        Property.adjust_counter(prop.id, 'visits_count', 1)
         
         return {
             "message": "Visit scheduled successfully",
@@ -340,18 +421,10 @@ def get_seller_visits(seller_id, status=None):
         if status:
             query = query(status=status)
         
-        visits = query.order_by('-visit_date')
+        visits = list(query.order_by('-visit_date'))
         
         # Enrich with property info
-        result = []
-        for visit in visits:
-            visit_data = _serialize_visit(visit)
-            prop = Property.objects(id=visit.property_id).first()
-            if prop:
-                visit_data["property_title"] = prop.title
-                visit_data["property_image"] = prop.image
-                visit_data["property_location"] = prop.location
-            result.append(visit_data)
+        result = _attach_property_summaries(visits, [_serialize_visit(v) for v in visits])
         
         return {"visits": result, "count": len(result)}, 200
     except Exception as e:
@@ -372,6 +445,7 @@ def update_visit_status(seller_id, visit_id, status):
         visit.status = status
         visit.updated_at = datetime.utcnow()
         visit.save()
+        _invalidate_dashboard(seller_id)
         
         return {
             "message": f"Visit {status.lower()}",
@@ -384,17 +458,9 @@ def update_visit_status(seller_id, visit_id, status):
 def get_user_visits(user_id):
     """Get all visits scheduled by a user."""
     try:
-        visits = ScheduledVisit.objects(user_id=ObjectId(user_id)).order_by('-visit_date')
+        visits = list(ScheduledVisit.objects(user_id=ObjectId(user_id)).order_by('-visit_date'))
         
-        result = []
-        for visit in visits:
-            visit_data = _serialize_visit(visit)
-            prop = Property.objects(id=visit.property_id).first()
-            if prop:
-                visit_data["property_title"] = prop.title
-                visit_data["property_image"] = prop.image
-                visit_data["property_location"] = prop.location
-            result.append(visit_data)
+        result = _attach_property_summaries(visits, [_serialize_visit(v) for v in visits])
         
         return {"visits": result, "count": len(result)}, 200
     except Exception as e:
@@ -438,8 +504,7 @@ def express_interest(user_id, property_id, data):
         interest.save()
         
         # Update property interests count
-        prop.interests_count = (prop.interests_count or 0) + 1
-        prop.save()
+        Property.adjust_counter(prop.id, 'interests_count', 1)
         
         return {
             "message": "Interest registered successfully",
@@ -456,18 +521,10 @@ def get_seller_interests(seller_id, status=None):
         if status:
             query = query(status=status)
         
-        interests = query.order_by('-created_at')
+        interests = list(query.order_by('-created_at'))
         
         # Enrich with property info
-        result = []
-        for interest in interests:
-            interest_data = _serialize_interest(interest)
-            prop = Property.objects(id=interest.property_id).first()
-            if prop:
-                interest_data["property_title"] = prop.title
-                interest_data["property_image"] = prop.image
-                interest_data["property_location"] = prop.location
-            result.append(interest_data)
+        result = _attach_property_summaries(interests, [_serialize_interest(i) for i in interests])
         
         return {"interests": result, "count": len(result)}, 200
     except Exception as e:
@@ -487,6 +544,7 @@ def update_interest_status(seller_id, interest_id, status):
         
         interest.status = status
         interest.save()
+        _invalidate_dashboard(seller_id)
         
         return {
             "message": f"Interest marked as {status.lower()}",
@@ -499,12 +557,12 @@ def update_interest_status(seller_id, interest_id, status):
 # ===== PROPERTY VIEW TRACKING =====
 
 def increment_property_view(property_id):
-    """Increment view count for a property."""
+    """Increment view count for a property.
+
+    Views go through the write-behind buffer and reach Mongo in batches.
+    """
     try:
-        prop = Property.objects(id=property_id).first()
-        if prop:
-            prop.views_count = (prop.views_count or 0) + 1
-            prop.save()
+        view_buffer.record(property_id)
         return {"success": True}, 200
     except Exception as e:
         return {"message": str(e)}, 400
@@ -515,13 +573,7 @@ def increment_property_view(property_id):
 def update_property_likes_count(property_id, increment=True):
     """Update the likes count on a property."""
     try:
-        prop = Property.objects(id=property_id).first()
-        if prop:
-            if increment:
-                prop.likes_count = (prop.likes_count or 0) + 1
-            else:
-                prop.likes_count = max(0, (prop.likes_count or 0) - 1)
-            prop.save()
+        Property.adjust_counter(property_id, 'likes_count', 1 if increment else -1)
         return True
     except:
         return False
@@ -0,0 +1,89 @@
+"""
+Geo helpers for property coordinates.
+
+Properties may carry a GeoJSON point in ``Property.geo``. Coordinates come
+from the API (latitude/longitude fields) or from geocode_backfill.py, which
+resolves the free-text location and city against an offline gazetteer.
+"""
+import csv
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def parse_coordinates(lat, lng):
+    """Return (lat, lng) as floats. Raises ValueError when missing or out of range."""
+    if lat is None or lng is None:
+        raise ValueError("Both latitude and longitude are required")
+    lat, lng = float(lat), float(lng)
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0) or math.isnan(lat) or math.isnan(lng):
+        raise ValueError("Latitude must be within [-90, 90] and longitude within [-180, 180]")
+    return lat, lng
+
+
+def geo_point(lat, lng):
+    """Build a GeoJSON point; GeoJSON orders coordinates as [longitude, latitude]."""
+    return {"type": "Point", "coordinates": [lng, lat]}
+
+
+def point_coordinates(value):
+    """Return (lat, lng) from a GeoJSON point or [lng, lat] pair, or None."""
+    if isinstance(value, dict):
+        value = value.get("coordinates")
+    if not value or len(value) != 2:
+        return None
+    return float(value[1]), float(value[0])
+
+
+def geo_point_from_data(data):
+    """Read an optional point from ``latitude``/``longitude`` in request data.
+
+    Returns None when neither is given. Raises ValueError for partial or
+    invalid coordinates.
+    """
+    lat, lng = data.get("latitude"), data.get("longitude")
+    if lat is None and lng is None:
+        return None
+    return geo_point(*parse_coordinates(lat, lng))
+
+
+def _normalize(value):
+    return " ".join((value or "").lower().replace(",", " ").split())
+
+
+class Gazetteer:
+    """Offline place lookup loaded from a CSV with name, city, lat and lng columns.
+
+    Rows with an empty name give a city's centre. Locations are resolved to
+    the first comma-separated part that names a place in the property's city,
+    falling back to the city centre.
+    """
+
+    def __init__(self):
+        self.places = {}
+        self.cities = {}
+
+    @classmethod
+    def load(cls, path):
+        gazetteer = cls()
+        with open(path, newline="", encoding="utf-8") as handle:
+            for row in csv.DictReader(handle):
+                coordinates = parse_coordinates(row["lat"], row["lng"])
+                city = _normalize(row["city"])
+                name = _normalize(row.get("name"))
+                if name:
+                    gazetteer.places[(name, city)] = coordinates
+                else:
+                    gazetteer.cities[city] = coordinates
+        return gazetteer
+
+    def lookup(self, location, city):
+        """Return ((lat, lng), precision) with precision "locality" or "city", or (None, None)."""
+        city_key = _normalize(city)
+        for part in (location or "").split(","):
+            coordinates = self.places.get((_normalize(part), city_key))
+            if coordinates:
+                return coordinates, "locality"
+        if city_key in self.cities:
+            return self.cities[city_key], "city"
+        return None, None
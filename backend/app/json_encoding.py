@@ -0,0 +1,47 @@
+"""
+Fast JSON encoding for API responses.
+
+Uses orjson when it is installed (``pip install orjson``) and the standard
+library otherwise. Both Flask's jsonify and the Flask-RESTful resources encode
+through ``dumps`` so responses look the same either way. Values JSON cannot
+represent, such as ObjectId, are encoded with str().
+"""
+import json
+
+from flask import make_response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_AVAILABLE = orjson is not None
+
+
+def dumps(obj, sort_keys=False):
+    """Encode ``obj`` as compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return json.dumps(
+        obj, default=str, sort_keys=sort_keys, separators=(',', ':'), ensure_ascii=False,
+    ).encode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with ``dumps``."""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj, sort_keys=kwargs.get('sort_keys', self.sort_keys)).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj, sort_keys=self.sort_keys), mimetype=self.mimetype)
+
+
+def output_json(data, code, headers=None):
+    """Flask-RESTful representation for application/json."""
+    response = make_response(dumps(data), code)
+    response.headers['Content-Type'] = 'application/json'
+    response.headers.extend(headers or {})
+    return response
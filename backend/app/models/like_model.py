@@ -0,0 +1,21 @@
+from mongoengine import Document, DateTimeField, ObjectIdField
+from datetime import datetime
+
+
+class Like(Document):
+    """A user's like of a property, one document per (user, property) pair."""
+    user_id = ObjectIdField(required=True)
+    property_id = ObjectIdField(required=True)
+    created_at = DateTimeField(default=datetime.utcnow)
+    
+    meta = {
+        'collection': 'likes',
+        'indexes': [
+            {'fields': ('user_id', 'property_id'), 'unique': True},
+            # Newest-first listing of a user's likes
+            ('user_id', '-created_at', 'property_id'),
+            'property_id',
+            # Incremental runs of cooccurrence_job.py
+            'created_at',
+        ],
+    }
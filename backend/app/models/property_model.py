@@ -1,13 +1,20 @@
-from mongoengine import Document, StringField, IntField, FloatField, ListField, BooleanField, DateTimeField, ObjectIdField, ReferenceField
+from mongoengine import Document, StringField, IntField, FloatField, ListField, BooleanField, DateTimeField, ObjectIdField, ReferenceField, PointField
+from bson import ObjectId
 from datetime import datetime
 
 
+# Cached stat fields on Property that are only changed through adjust_counter
+COUNTER_FIELDS = ('likes_count', 'interests_count', 'visits_count', 'views_count')
+
+
 class Property(Document):
     # Basic Info
     title = StringField(required=True)
     description = StringField(required=True)
     location = StringField(required=True)
     city = StringField(required=True)
+    # Optional GeoJSON point ([longitude, latitude]); see geocode_backfill.py
+    geo = PointField(required=False, auto_index=False)
     
     # Property Details
     property_type = StringField(required=True)  # Apartment, Villa, Row House, etc.
@@ -48,10 +55,66 @@ class Property(Document):
     
     meta = {
         'collection': 'properties',
-        'indexes': ['city', 'property_type', 'posted_date', 'featured', 'seller_id'],
+        'indexes': [
+            'posted_date',
+            # Listing order and keyset pagination, optionally filtered by city/type
+            ('-featured', '-posted_date', '-id'),
+            ('city', '-featured', '-posted_date', '-id'),
+            ('property_type', '-featured', '-posted_date', '-id'),
+            ('city', 'property_type', '-featured', '-posted_date', '-id'),
+            # Featured listings
+            ('featured', 'available', '-posted_date'),
+            # Seller listings and dashboard
+            ('seller_id', '-posted_date'),
+            ('seller_id', 'status'),
+            # Similar-property lookup: equality, then sort, then price range
+            ('property_type', 'location', '-featured', '-likes_count', 'price'),
+            # Proximity queries (/properties/nearby, recommendations)
+            '(geo',
+            # Keyword search (/properties/search)
+            {
+                'fields': ['$title', '$location', '$amenities', '$description'],
+                'default_language': 'english',
+                'weights': {'title': 10, 'location': 5, 'amenities': 3, 'description': 1},
+            },
+        ],
         'strict': False,  # Allow extra fields in documents
     }
 
+    def save(self, *args, **kwargs):
+        """Save the document, stamping ``updated_at`` on every content write.
+
+        ``updated_at`` drives Last-Modified on the property endpoints, so
+        adjust_counter and the view buffer stamp it on counter updates too.
+        """
+        self.updated_at = datetime.utcnow()
+        return super().save(*args, **kwargs)
+
+    @classmethod
+    def adjust_counter(cls, property_id, field, amount=1):
+        """Atomically add ``amount`` to a stat counter without reading the document.
+
+        Decrements are clamped with $max so a counter never goes below zero.
+        Also stamps ``updated_at``. Returns True when the property exists.
+        """
+        if field not in COUNTER_FIELDS:
+            raise ValueError(f"Unknown counter field: {field}")
+        
+        collection = cls._get_collection()
+        now = datetime.utcnow()
+        if amount >= 0:
+            result = collection.update_one(
+                {'_id': ObjectId(property_id)}, {'$inc': {field: amount}, '$set': {'updated_at': now}},
+            )
+        else:
+            result = collection.update_one({'_id': ObjectId(property_id)}, [
+                {'$set': {
+                    field: {'$max': [0, {'$add': [{'$ifNull': [f'${field}', 0]}, amount]}]},
+                    'updated_at': now,
+                }},
+            ])
+        return result.matched_count > 0
+
 
 class ScheduledVisit(Document):
     """Track scheduled property visits"""
@@ -78,7 +141,14 @@ class ScheduledVisit(Document):
     
     meta = {
         'collection': 'scheduled_visits',
-        'indexes': ['property_id', 'user_id', 'seller_id', 'visit_date', 'status']
+        'indexes': [
+            'visit_date', 'status',
+            ('seller_id', '-visit_date'),
+            ('seller_id', 'status', '-visit_date'),
+            ('seller_id', '-created_at'),
+            ('user_id', '-visit_date'),
+            ('property_id', 'user_id', 'status'),
+        ]
     }
 
 
@@ -105,6 +175,11 @@ class PropertyInterest(Document):
     
     meta = {
         'collection': 'property_interests',
-        'indexes': ['property_id', 'user_id', 'seller_id', 'status'],
+        'indexes': [
+            'user_id', 'status',
+            ('seller_id', '-created_at'),
+            ('seller_id', 'status', '-created_at'),
+            ('property_id', 'user_id', '-created_at'),
+        ],
         'ordering': ['-created_at']
     }
@@ -9,5 +9,6 @@ class User(Document):
     locked_until = DateTimeField(default=None)
     created_at = DateTimeField(default=datetime.utcnow)
     
-    # User interests/liked properties
+    # Legacy liked properties; likes now live in the Like collection.
+    # Kept so migrate_likes.py can read and clear existing arrays.
     liked_properties = ListField(ObjectIdField(), default=[])
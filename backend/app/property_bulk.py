@@ -0,0 +1,366 @@
+"""
+Streaming bulk import and export of property listings.
+
+Imports read CSV or NDJSON (one JSON object per line) from any binary stream
+row by row, validate each row with the same rules as create_property and
+write every BULK_BATCH_SIZE valid rows with one unordered insert_many. Rows
+carrying an ``id`` update that existing property instead, through an
+unordered bulk_write, so an export can be edited and imported again. An id
+that matches no property (or, for sellers, none of their own) is reported as
+a row error; only admin imports with ``upsert`` create listings for unknown
+ids. Updates only set the fields a row gives; INSERT_DEFAULTS fill in the
+rest for new listings. Memory use is bounded by the batch size and the
+capped error list, not the file.
+
+Exports stream from a server-side cursor in the same column layout. In CSV,
+list fields (images, amenities) are joined with "|".
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from flask import Response, request, stream_with_context
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.geo import geo_point_from_data, point_coordinates
+from app.json_encoding import dumps
+from app.models.property_model import Property
+
+BULK_BATCH_SIZE = 1000
+# Most per-row errors returned in an import report; later ones are only counted
+MAX_REPORTED_ERRORS = 1000
+LIST_SEPARATOR = "|"
+INVALID_UTF8 = "Line is not valid UTF-8"
+
+FORMATS = ("csv", "ndjson")
+REQUIRED_FIELDS = ("title", "description", "location", "city", "property_type",
+                   "price", "area", "bedrooms", "bathrooms", "image")
+INT_FIELDS = ("price", "area", "bedrooms", "bathrooms")
+LIST_FIELDS = ("images", "amenities")
+BOOL_FIELDS = ("featured", "verified", "available")
+OPTIONAL_FIELDS = ("status", "seller_phone")
+# Values of optional fields a new listing gets when its row leaves them out
+INSERT_DEFAULTS = {"images": [], "amenities": [], "featured": False, "verified": False,
+                   "available": True, "status": "Active"}
+
+# Export layout; import accepts the same columns
+EXPORT_COLUMNS = ("id",) + REQUIRED_FIELDS + LIST_FIELDS + BOOL_FIELDS + OPTIONAL_FIELDS + (
+    "latitude", "longitude", "seller_id", "seller_name", "likes_count", "views_count", "posted_date",
+)
+
+
+def detect_format(fmt=None, content_type=None, filename=None):
+    """Pick csv or ndjson from an explicit format, file extension or content type."""
+    if fmt:
+        fmt = fmt.lower()
+    elif filename and filename.lower().endswith((".ndjson", ".jsonl")):
+        fmt = "ndjson"
+    elif filename and filename.lower().endswith(".csv"):
+        fmt = "csv"
+    elif content_type and "ndjson" in content_type:
+        fmt = "ndjson"
+    else:
+        fmt = "csv"
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Use one of: {', '.join(FORMATS)}")
+    return fmt
+
+
+def _text_lines(stream, bad_lines):
+    """Decode a binary stream line by line, dropping a UTF-8 byte order mark.
+
+    A line that is not valid UTF-8 is replaced by an empty one and its number
+    appended to ``bad_lines``, so the rest of the file still imports.
+    """
+    for line_num, raw in enumerate(stream, start=1):
+        try:
+            yield raw.decode("utf-8-sig" if line_num == 1 else "utf-8")
+        except UnicodeDecodeError:
+            bad_lines.append(line_num)
+            yield "\n"
+
+
+def iter_rows(stream, fmt):
+    """Yield (row number, dict or error message) for every record in ``stream``."""
+    bad_lines = []
+    if fmt == "csv":
+        reader = csv.DictReader(_text_lines(stream, bad_lines))
+        try:
+            for row in reader:
+                while bad_lines:
+                    yield bad_lines.pop(0), INVALID_UTF8
+                yield reader.line_num, row
+        except csv.Error as e:
+            yield reader.line_num, f"Malformed CSV: {str(e)}"
+        for line_num in bad_lines:
+            yield line_num, INVALID_UTF8
+        return
+
+    for line_num, line in enumerate(_text_lines(stream, bad_lines), start=1):
+        if bad_lines and bad_lines[-1] == line_num:
+            yield line_num, INVALID_UTF8
+            continue
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_num, f"Invalid JSON: {str(e)}"
+            continue
+        yield line_num, row if isinstance(row, dict) else "Each line must be a JSON object"
+
+
+def _as_list(value):
+    if value is None or value == "":
+        return []
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in str(value).split(LIST_SEPARATOR) if item.strip()]
+
+
+def _as_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "y")
+
+
+def validate_row(row, seller=None):
+    """Convert an import row into a raw property document.
+
+    Returns (property id or None, document). Raises ValueError describing the
+    first problem. With ``seller`` the listing is attributed to that seller;
+    new listings are never featured or verified, as in create_seller_property,
+    and updates leave both flags unchanged.
+    """
+    missing = [field for field in REQUIRED_FIELDS if row.get(field) in (None, "")]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+
+    doc = {}
+    for field in REQUIRED_FIELDS:
+        value = row[field]
+        if field in INT_FIELDS:
+            try:
+                doc[field] = int(float(value))
+            except (TypeError, ValueError):
+                raise ValueError(f"{field} must be a number")
+        else:
+            doc[field] = str(value).strip()
+    # Optional fields are only set when the row gives them, so updates keep
+    # the stored values; inserts fill the gaps from INSERT_DEFAULTS
+    for field in LIST_FIELDS:
+        if row.get(field) is not None:
+            doc[field] = _as_list(row[field])
+    for field in BOOL_FIELDS:
+        if row.get(field) not in (None, ""):
+            doc[field] = _as_bool(row[field])
+    for field in OPTIONAL_FIELDS:
+        if row.get(field) not in (None, ""):
+            doc[field] = str(row[field]).strip()
+
+    geo = geo_point_from_data({
+        "latitude": row.get("latitude") if row.get("latitude") != "" else None,
+        "longitude": row.get("longitude") if row.get("longitude") != "" else None,
+    })
+    if geo:
+        doc["geo"] = geo
+
+    prop_id = None
+    if row.get("id"):
+        try:
+            prop_id = ObjectId(str(row["id"]))
+        except Exception:
+            raise ValueError("id must be a property id")
+
+    if seller is not None:
+        doc.update(seller)
+        if prop_id is None:
+            doc["featured"] = False
+            doc["verified"] = False
+        else:
+            # Sellers cannot change them, so updates keep what an admin set
+            doc.pop("featured", None)
+            doc.pop("verified", None)
+    return prop_id, doc
+
+
+class ImportReport:
+    """Counts and per-row errors of one import."""
+
+    def __init__(self):
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, row_num, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_num, "message": message})
+
+    def as_dict(self):
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def _write_batch(collection, inserts, updates, report, seller_id=None, upsert=False):
+    """Write one batch with unordered writes, recording rejected rows."""
+    if inserts:
+        now = datetime.utcnow()
+        docs = []
+        for _, doc in inserts:
+            doc = dict(INSERT_DEFAULTS, **doc, posted_date=now, created_at=now, updated_at=now,
+                       likes_count=0, interests_count=0, visits_count=0, views_count=0)
+            docs.append(doc)
+        try:
+            report.inserted += len(collection.insert_many(docs, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            report.inserted += e.details.get("nInserted", 0)
+            for write_error in e.details.get("writeErrors", []):
+                report.error(inserts[write_error["index"]][0], write_error.get("errmsg", "Write failed"))
+
+    if updates:
+        now = datetime.utcnow()
+        owner = {} if seller_id is None else {"seller_id": seller_id}
+        # Only ids that exist (and belong to the seller) are updated
+        existing = {
+            doc["_id"] for doc in collection.find(
+                dict(owner, _id={"$in": [prop_id for _, prop_id, _ in updates]}), {"_id": 1},
+            )
+        }
+        operations, rows = [], []
+        for row_num, prop_id, doc in updates:
+            if prop_id in existing:
+                operations.append(UpdateOne(dict(owner, _id=prop_id), {"$set": dict(doc, updated_at=now)}))
+            elif upsert and seller_id is None:
+                operations.append(UpdateOne({"_id": prop_id}, {
+                    "$set": dict(doc, updated_at=now),
+                    "$setOnInsert": dict(
+                        {field: value for field, value in INSERT_DEFAULTS.items() if field not in doc},
+                        posted_date=now, created_at=now, likes_count=0,
+                        interests_count=0, visits_count=0, views_count=0,
+                    ),
+                }, upsert=True))
+            else:
+                report.error(row_num, "Property not found" if seller_id is None
+                             else "Property not found or access denied")
+                continue
+            rows.append(row_num)
+        if not operations:
+            return
+        try:
+            result = collection.bulk_write(operations, ordered=False)
+            report.updated += result.matched_count
+            report.inserted += result.upserted_count
+        except BulkWriteError as e:
+            report.updated += e.details.get("nMatched", 0)
+            report.inserted += e.details.get("nUpserted", 0)
+            for write_error in e.details.get("writeErrors", []):
+                report.error(rows[write_error["index"]], write_error.get("errmsg", "Write failed"))
+
+
+def import_properties(stream, fmt, seller=None, upsert=False, batch_size=BULK_BATCH_SIZE):
+    """Import listings from a binary CSV/NDJSON stream. Returns an ImportReport.
+
+    ``seller`` is a dict with seller_id, seller_name and seller_email applied
+    to every row; seller imports only update that seller's listings. With
+    ``upsert`` (admin imports only) rows whose id matches no listing create
+    one with that id instead of failing.
+    """
+    collection = Property._get_collection()
+    seller_id = seller["seller_id"] if seller else None
+    report = ImportReport()
+    inserts, updates = [], []
+
+    for row_num, row in iter_rows(stream, fmt):
+        if isinstance(row, str):
+            report.error(row_num, row)
+            continue
+        try:
+            prop_id, doc = validate_row(row, seller)
+        except ValueError as e:
+            report.error(row_num, str(e))
+            continue
+        if prop_id is None:
+            inserts.append((row_num, doc))
+        else:
+            updates.append((row_num, prop_id, doc))
+
+        if len(inserts) + len(updates) >= batch_size:
+            _write_batch(collection, inserts, updates, report, seller_id, upsert)
+            inserts, updates = [], []
+
+    _write_batch(collection, inserts, updates, report, seller_id, upsert)
+    return report
+
+
+def _export_record(doc):
+    coordinates = point_coordinates(doc.get("geo"))
+    posted_date = doc.get("posted_date")
+    record = {
+        "id": str(doc["_id"]),
+        "latitude": coordinates[0] if coordinates else None,
+        "longitude": coordinates[1] if coordinates else None,
+        "seller_id": str(doc["seller_id"]) if doc.get("seller_id") else None,
+        "posted_date": posted_date.isoformat() if posted_date else None,
+    }
+    for column in EXPORT_COLUMNS:
+        if column not in record:
+            record[column] = doc.get(column)
+    return record
+
+
+def export_properties(query, fmt, batch_size=BULK_BATCH_SIZE):
+    """Yield the listings in ``query`` as CSV or NDJSON text chunks.
+
+    Documents come from a server-side cursor fetched ``batch_size`` at a time.
+    """
+    cursor = query.order_by("id").as_pymongo().batch_size(batch_size)
+
+    if fmt == "ndjson":
+        for doc in cursor:
+            yield dumps(_export_record(doc)).decode("utf-8") + "\n"
+        return
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for count, doc in enumerate(cursor, start=1):
+        record = _export_record(doc)
+        for field in LIST_FIELDS:
+            record[field] = LIST_SEPARATOR.join(record[field] or [])
+        writer.writerow(record)
+        if count % 100 == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def request_upload():
+    """Return (binary stream, filename, content type) of an import request.
+
+    Accepts a multipart upload in the ``file`` field or the raw request body.
+    """
+    upload = request.files.get("file")
+    if upload is not None:
+        return upload.stream, upload.filename, upload.mimetype
+    return request.stream, None, request.mimetype
+
+
+def export_response(chunks, fmt, filename):
+    """Stream export chunks as a file download."""
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
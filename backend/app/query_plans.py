@@ -0,0 +1,116 @@
+"""
+Query plan checks.
+
+Runs explain() on every query shape the controllers issue and reports shapes
+whose winning plan scans the whole collection (COLLSCAN) or sorts in memory
+(SORT). Run it against a database with the app's indexes:
+
+    python -m app.query_plans
+
+Set CHECK_QUERY_PLANS=true to run the same check when the app starts.
+"""
+import logging
+import sys
+
+from bson import ObjectId
+
+from app.controllers.property_controller import LISTING_ORDER
+from app.models.like_model import Like
+from app.models.property_model import Property, ScheduledVisit, PropertyInterest
+
+logger = logging.getLogger(__name__)
+
+# Stages that mean an index is missing for a query shape
+PROBLEM_STAGES = ('COLLSCAN', 'SORT')
+
+
+def _query_shapes():
+    """Return (name, queryset) pairs for every controller query shape.
+
+    Values are placeholders; plan selection depends on the shape, not the data.
+    """
+    oid = ObjectId()
+    return [
+        ("properties.list", Property.objects().order_by(*LISTING_ORDER)),
+        ("properties.list.city", Property.objects(city="x").order_by(*LISTING_ORDER)),
+        ("properties.list.type", Property.objects(property_type="x").order_by(*LISTING_ORDER)),
+        ("properties.list.city_type_price", Property.objects(
+            city="x", property_type="x", price__gte=0, price__lte=1,
+        ).order_by(*LISTING_ORDER)),
+        ("properties.search.text", Property.objects(city="x", bedrooms__gte=1).search_text("x")),
+        ("properties.featured", Property.objects(featured=True, available=True).order_by('-posted_date')),
+        ("seller.properties", Property.objects(seller_id=oid).order_by('-posted_date')),
+        ("seller.dashboard.active", Property.objects(seller_id=oid, status='Active')),
+        ("seller.visits", ScheduledVisit.objects(seller_id=oid).order_by('-visit_date')),
+        ("seller.visits.status", ScheduledVisit.objects(seller_id=oid, status='Pending').order_by('-visit_date')),
+        ("seller.activity.visits", ScheduledVisit.objects(seller_id=oid).order_by('-created_at')),
+        ("user.visits", ScheduledVisit.objects(user_id=oid).order_by('-visit_date')),
+        ("visit.existing", ScheduledVisit.objects(
+            property_id=oid, user_id=oid, status__in=['Pending', 'Confirmed'],
+        )),
+        ("seller.interests", PropertyInterest.objects(seller_id=oid).order_by('-created_at')),
+        ("seller.interests.status", PropertyInterest.objects(seller_id=oid, status='New').order_by('-created_at')),
+        ("interest.existing", PropertyInterest.objects(property_id=oid, user_id=oid)),
+        ("likes.user", Like.objects(user_id=oid).order_by('-created_at')),
+        ("likes.pair", Like.objects(user_id=oid, property_id=oid)),
+        ("recommendations.similar", Property.objects(
+            property_type="x", location="x", id__ne=oid, price__gte=0, price__lte=1,
+        ).order_by('-featured', '-likes_count')),
+        ("recommendations.similar.geo", Property.objects(
+            property_type="x", id__ne=oid, price__gte=0, price__lte=1,
+            geo__near=[0, 0], geo__max_distance=1000,
+        )),
+    ]
+
+
+def _plan_stages(plan):
+    """Yield every stage name in an explain plan tree."""
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            yield plan['stage']
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+
+def explain_query_shapes():
+    """Explain each query shape and return a list of problem reports.
+
+    Each report is a dict with the shape name and the offending stages.
+    """
+    problems = []
+    for name, queryset in _query_shapes():
+        try:
+            explanation = queryset.explain()
+        except Exception as e:
+            problems.append({"shape": name, "stages": [], "error": str(e)})
+            continue
+
+        winning_plan = explanation.get('queryPlanner', {}).get('winningPlan', {})
+        stages = sorted({s for s in _plan_stages(winning_plan) if s in PROBLEM_STAGES})
+        if stages:
+            problems.append({"shape": name, "stages": stages})
+    return problems
+
+
+def report_query_plans():
+    """Log problem query shapes. Returns True when every shape uses an index."""
+    problems = explain_query_shapes()
+    for problem in problems:
+        if problem.get("error"):
+            logger.warning(f"Query plan check failed for {problem['shape']}: {problem['error']}")
+        else:
+            logger.warning(f"Query shape {problem['shape']} uses {', '.join(problem['stages'])}")
+    if not problems:
+        logger.info("Query plan check passed: all query shapes use indexes")
+    return not problems
+
+
+if __name__ == "__main__":
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        sys.exit(0 if report_query_plans() else 1)
@@ -0,0 +1,232 @@
+"""
+Per-request Mongo command profiling.
+
+A pymongo CommandListener counts the commands each request sends, their
+total server time and the slowest one, and adds them to the response as a
+Server-Timing header (visible in the browser dev tools):
+
+    Server-Timing: db;dur=12.4;desc="7 queries", db-slowest;dur=6.1;desc="aggregate properties", app;dur=20.3
+
+Requests slower than QUERY_PROFILE_SLOW_MS, or sending more than
+QUERY_PROFILE_MAX_COMMANDS commands (the usual sign of an N+1 loop), are
+logged with the shapes of their commands (field names and operators, values
+replaced by "?"), grouped so a repeated shape shows up with its count. Totals
+per route are served at /metrics/queries.
+
+Commands sent outside a request (workers, flusher threads) are not counted.
+"""
+import json
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from flask import request
+from pymongo import monitoring
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Most command shapes kept per request for the slow request log
+MAX_SHAPES_PER_REQUEST = 50
+
+_current_profile = ContextVar("query_profile", default=None)
+
+
+def _shape(value):
+    """Replace the values in a query document with "?", keeping keys and operators."""
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, dict) for item in value):
+            return [_shape(item) for item in value]
+        return "[?]"
+    return "?"
+
+
+def command_shape(command_name, command):
+    """Describe a command as "<name> <collection> <shape>" without its values."""
+    collection = command.get("collection") if command_name == "getMore" else command.get(command_name)
+    collection = collection if isinstance(collection, str) else ""
+    if command_name == "find":
+        body = {"filter": _shape(command.get("filter", {}))}
+        if command.get("sort"):
+            body["sort"] = dict(command["sort"])
+    elif command_name == "aggregate":
+        body = [_shape(stage) if "$match" in stage else next(iter(stage), "?")
+                for stage in command.get("pipeline", [])]
+    elif command_name in ("count", "findAndModify"):
+        body = _shape(command.get("query", {}))
+    elif command_name == "distinct":
+        body = {"key": command.get("key"), "query": _shape(command.get("query", {}))}
+    elif command_name == "update":
+        body = [_shape(update.get("q", {})) for update in command.get("updates", [])[:1]]
+    elif command_name == "delete":
+        body = [_shape(delete.get("q", {})) for delete in command.get("deletes", [])[:1]]
+    elif command_name == "insert":
+        body = f"{len(command.get('documents', []))} documents"
+    else:
+        body = None
+    shape = f"{command_name} {collection}".strip()
+    if body is None:
+        return shape
+    return f"{shape} {body if isinstance(body, str) else json.dumps(body, default=str)}"
+
+
+def _format_shapes(shapes):
+    """One line per distinct shape with its count and db time, repeated shapes first."""
+    grouped = {}
+    for micros, shape in shapes:
+        count, total = grouped.get(shape, (0, 0))
+        grouped[shape] = (count + 1, total + micros)
+    ordered = sorted(grouped.items(), key=lambda item: (-item[1][0], -item[1][1]))
+    return "\n".join(f"  {count:4d}x {total / 1000:8.1f} ms  {shape}" for shape, (count, total) in ordered)
+
+
+class RequestProfile:
+    """Commands sent while handling one request."""
+
+    __slots__ = ("started", "commands", "db_micros", "slowest", "shapes", "pending")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.commands = 0
+        self.db_micros = 0
+        self.slowest = None  # (micros, shape)
+        self.shapes = []
+        self.pending = {}
+
+    def finish(self, key, micros):
+        shape = self.pending.pop(key, None)
+        if shape is None:
+            return
+        self.commands += 1
+        self.db_micros += micros
+        if self.slowest is None or micros > self.slowest[0]:
+            self.slowest = (micros, shape)
+        if len(self.shapes) < MAX_SHAPES_PER_REQUEST:
+            self.shapes.append((micros, shape))
+
+
+class QueryProfiler(monitoring.CommandListener):
+    """Profiles Mongo commands per request and keeps per-route totals."""
+
+    def __init__(self, slow_request_ms=500, max_commands=20):
+        self.slow_request_ms = slow_request_ms
+        self.max_commands = max_commands
+        self._routes = {}
+        self._lock = threading.Lock()
+        self._registered = False
+
+    def init_app(self, app):
+        """Register the listener and the request hooks.
+
+        Must run before the Mongo client is created; pymongo only attaches
+        globally registered listeners to clients created afterwards.
+        """
+        if not self._registered:
+            monitoring.register(self)
+            self._registered = True
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._clear_request)
+
+    # pymongo listener callbacks; they run on the thread that sent the command
+
+    def started(self, event):
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.pending[(event.connection_id, event.request_id)] = command_shape(
+                event.command_name, event.command,
+            )
+
+    def succeeded(self, event):
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.finish((event.connection_id, event.request_id), event.duration_micros)
+
+    def failed(self, event):
+        self.succeeded(event)
+
+    # Flask request hooks
+
+    def _start_request(self):
+        _current_profile.set(RequestProfile())
+
+    def _finish_request(self, response):
+        profile = _current_profile.get()
+        if profile is None:
+            return response
+
+        elapsed_ms = (time.perf_counter() - profile.started) * 1000
+        db_ms = profile.db_micros / 1000
+        timings = [f'db;dur={db_ms:.1f};desc="{profile.commands} queries"']
+        if profile.slowest:
+            name = " ".join(profile.slowest[1].split(" ", 2)[:2])
+            timings.append(f'db-slowest;dur={profile.slowest[0] / 1000:.1f};desc="{name}"')
+        timings.append(f"app;dur={elapsed_ms:.1f}")
+        response.headers.add("Server-Timing", ", ".join(timings))
+
+        route = f"{request.method} {request.url_rule.rule}" if request.url_rule else f"{request.method} <unmatched>"
+        slow = elapsed_ms >= self.slow_request_ms or profile.commands > self.max_commands
+        self._record(route, profile, elapsed_ms, db_ms, slow)
+        if slow:
+            logger.warning(
+                "Slow request %s %s: %.1f ms, %s queries, %.1f ms in db. Query shapes:\n%s",
+                request.method, request.full_path.rstrip("?"), elapsed_ms, profile.commands, db_ms,
+                _format_shapes(profile.shapes),
+            )
+        return response
+
+    def _clear_request(self, exc=None):
+        _current_profile.set(None)
+
+    def _record(self, route, profile, elapsed_ms, db_ms, slow):
+        with self._lock:
+            totals = self._routes.get(route)
+            if totals is None:
+                totals = self._routes[route] = {
+                    "requests": 0, "slow_requests": 0, "commands": 0, "max_commands": 0,
+                    "db_ms": 0.0, "max_db_ms": 0.0, "total_ms": 0.0, "max_total_ms": 0.0,
+                    "slowest_command_ms": 0.0, "slowest_command": None,
+                }
+            totals["requests"] += 1
+            totals["slow_requests"] += 1 if slow else 0
+            totals["commands"] += profile.commands
+            totals["max_commands"] = max(totals["max_commands"], profile.commands)
+            totals["db_ms"] += db_ms
+            totals["max_db_ms"] = max(totals["max_db_ms"], db_ms)
+            totals["total_ms"] += elapsed_ms
+            totals["max_total_ms"] = max(totals["max_total_ms"], elapsed_ms)
+            if profile.slowest and profile.slowest[0] / 1000 > totals["slowest_command_ms"]:
+                totals["slowest_command_ms"] = profile.slowest[0] / 1000
+                totals["slowest_command"] = profile.slowest[1]
+
+    def stats(self):
+        """Per-route totals and averages, routes with the most db time first."""
+        with self._lock:
+            routes = [dict(totals, route=route) for route, totals in self._routes.items()]
+        for totals in routes:
+            count = totals["requests"]
+            totals["avg_commands"] = round(totals["commands"] / count, 2)
+            totals["avg_db_ms"] = round(totals["db_ms"] / count, 2)
+            totals["avg_total_ms"] = round(totals["total_ms"] / count, 2)
+            for key in ("db_ms", "max_db_ms", "total_ms", "max_total_ms", "slowest_command_ms"):
+                totals[key] = round(totals[key], 2)
+        routes.sort(key=lambda totals: totals["db_ms"], reverse=True)
+        return {
+            "slow_request_ms": self.slow_request_ms,
+            "max_commands": self.max_commands,
+            "routes": routes,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._routes = {}
+
+
+query_profiler = QueryProfiler(
+    slow_request_ms=Config.QUERY_PROFILE_SLOW_MS,
+    max_commands=Config.QUERY_PROFILE_MAX_COMMANDS,
+)
@@ -0,0 +1,224 @@
+"""
+Response cache for the public property read endpoints.
+
+GET /properties, /properties/featured and /properties/<id> responses are
+cached under keys built from the endpoint and its normalized query
+parameters. Every key also carries the generation of its namespace; property
+writes bump the generation instead of hunting down keys, so stale entries are
+never read again and simply age out.
+
+Two backends are available, picked with RESPONSE_CACHE_BACKEND:
+
+    memory  an in-process LRU with TTL (default). Each worker process has its
+            own cache, so writes in one process reach the others only when
+            their entries expire after RESPONSE_CACHE_TTL seconds.
+    redis   a shared cache at RESPONSE_CACHE_REDIS_URL (needs the redis
+            package). Any client with get/set/incr works, so tests can pass a
+            local stand-in such as fakeredis.
+    none    caching disabled.
+
+Likes and views do not invalidate the cache; their counts in cached responses
+are at most RESPONSE_CACHE_TTL seconds old.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+PROPERTIES_NAMESPACE = "properties"
+
+
+class MemoryCacheBackend:
+    """Thread-safe in-process LRU cache with per-entry expiry."""
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max(1, int(max_entries))
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generation(self, namespace):
+        with self._lock:
+            return self._generations.get(namespace, 0)
+
+    def bump_generation(self, namespace):
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    def size(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class RedisCacheBackend:
+    """Cache shared by every process through Redis.
+
+    Values are stored as JSON. ``client`` is any object with the redis-py
+    get/set/incr interface; without one a client is created from ``url``.
+    """
+
+    def __init__(self, client=None, url=None, prefix="response-cache:"):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, json.dumps(value, default=str), ex=max(1, int(ttl)))
+
+    def generation(self, namespace):
+        raw = self.client.get(f"{self.prefix}gen:{namespace}")
+        return int(raw) if raw is not None else 0
+
+    def bump_generation(self, namespace):
+        self.client.incr(f"{self.prefix}gen:{namespace}")
+
+    def size(self):
+        return None
+
+
+class ResponseCache:
+    """Caches (result, status) pairs and counts hits and misses."""
+
+    def __init__(self, backend=None, ttl=30):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "invalidations": 0,
+            "errors": 0,
+        }
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    @staticmethod
+    def make_key(endpoint, params):
+        """Build a key from the endpoint and its parsed query parameters.
+
+        Parameters left at None are dropped and the rest sorted, so requests
+        that differ only in parameter order or empty values share an entry.
+        """
+        items = sorted((name, value) for name, value in params.items() if value is not None)
+        return f"{endpoint}?{urlencode(items)}"
+
+    def get_or_compute(self, endpoint, params, compute, namespace=PROPERTIES_NAMESPACE):
+        """Return the cached response for the request or compute and store it.
+
+        ``compute`` returns a (result, status) pair; only 200 responses are
+        cached. Backend errors are logged and the response is computed as if
+        the cache were disabled.
+        """
+        if not self.enabled:
+            return compute()
+
+        key = None
+        try:
+            generation = self.backend.generation(namespace)
+            key = f"{namespace}:{generation}:{self.make_key(endpoint, params)}"
+            cached = self.backend.get(key)
+        except Exception as e:
+            cached = None
+            self._count("errors")
+            logger.error(f"Response cache read failed: {str(e)}")
+
+        if cached is not None:
+            self._count("hits")
+            return cached, 200
+
+        self._count("misses")
+        result, status = compute()
+        if status == 200 and key is not None:
+            try:
+                self.backend.set(key, result, self.ttl)
+                self._count("stores")
+            except Exception as e:
+                self._count("errors")
+                logger.error(f"Response cache write failed: {str(e)}")
+        return result, status
+
+    def invalidate(self, namespace=PROPERTIES_NAMESPACE):
+        """Make every cached response in ``namespace`` stale."""
+        if not self.enabled:
+            return
+        try:
+            self.backend.bump_generation(namespace)
+            self._count("invalidations")
+        except Exception as e:
+            self._count("errors")
+            logger.error(f"Response cache invalidation failed: {str(e)}")
+
+    def stats(self):
+        """Return cache counters for the metrics endpoint."""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else None
+        stats["backend"] = type(self.backend).__name__ if self.backend else None
+        stats["ttl"] = self.ttl
+        if self.backend is not None:
+            try:
+                stats["entries"] = self.backend.size()
+            except Exception:
+                stats["entries"] = None
+        return stats
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+
+def _build_backend():
+    backend = Config.RESPONSE_CACHE_BACKEND
+    if backend == "none":
+        return None
+    if backend == "redis":
+        try:
+            return RedisCacheBackend(url=Config.RESPONSE_CACHE_REDIS_URL)
+        except ImportError:
+            logger.warning("redis package not installed; using the in-process response cache")
+    elif backend != "memory":
+        logger.warning(f"Unknown RESPONSE_CACHE_BACKEND {backend!r}; using the in-process response cache")
+    return MemoryCacheBackend(max_entries=Config.RESPONSE_CACHE_MAX_ENTRIES)
+
+
+response_cache = ResponseCache(_build_backend(), ttl=Config.RESPONSE_CACHE_TTL)
+
+
+def invalidate_property_responses():
+    """Called after any property write that public listings can show."""
+    response_cache.invalidate(PROPERTIES_NAMESPACE)
@@ -1,9 +1,11 @@
 from flask import Blueprint, request
 from flask_restful import Api, Resource
+from app.json_encoding import output_json
 from app.controllers.auth_controller import register_user, login_user
 
 auth_bp = Blueprint("auth", __name__)
 api = Api(auth_bp)
+api.representations["application/json"] = output_json
 
 class Register(Resource):
     def post(self):
@@ -6,6 +6,7 @@ from app.controllers.likes_controller import (
     get_user_liked_properties,
     check_liked_properties,
     get_recommendations,
+    get_recommendation_feed,
 )
 
 likes_bp = Blueprint("likes", __name__)
@@ -35,7 +36,8 @@ def user_liked_properties_route():
     """Get all properties liked by user."""
     user_id = get_jwt_identity()
     page = request.args.get("page", 1, type=int)
-    result, status = get_user_liked_properties(user_id, page)
+    fields = request.args.get("fields", type=str)
+    result, status = get_user_liked_properties(user_id, page, fields)
     return jsonify(result), status
 
 
@@ -56,3 +58,13 @@ def get_recommendations_route():
     page = request.args.get("page", 1, type=int)
     result, status = get_recommendations(user_id, page)
     return jsonify(result), status
+
+
+@likes_bp.route("/recommendations/feed", methods=["GET"])
+@jwt_required()
+def get_recommendation_feed_route():
+    """Get one ranked, de-duplicated list of recommended properties for user."""
+    user_id = get_jwt_identity()
+    page = request.args.get("page", 1, type=int)
+    result, status = get_recommendation_feed(user_id, page)
+    return jsonify(result), status
@@ -1,16 +1,25 @@
 from flask import Blueprint, request
 from flask_restful import Api, Resource
+from app.json_encoding import output_json
 from app.controllers.property_controller import (
     get_all_properties,
     get_featured_properties,
+    search_properties,
+    get_nearby_properties,
+    import_properties_from_stream,
+    export_all_properties,
     get_property_by_id,
     create_property,
     update_property,
     delete_property,
 )
+from app.response_cache import response_cache
+from app.conditional import conditional_response, property_last_modified
+from app.property_bulk import export_response, request_upload
 
 property_bp = Blueprint("properties", __name__)
 api = Api(property_bp)
+api.representations["application/json"] = output_json
 
 
 class Properties(Resource):
@@ -21,15 +30,24 @@ class Properties(Resource):
         property_type = request.args.get("property_type", type=str)
         min_price = request.args.get("min_price", type=int)
         max_price = request.args.get("max_price", type=int)
+        cursor = request.args.get("cursor", type=str)
+        include_total = request.args.get("include_total", type=str)
+        fields = request.args.get("fields", type=str)
         
-        result = get_all_properties(
-            page=page,
-            city=city,
-            property_type=property_type,
-            min_price=min_price,
-            max_price=max_price,
+        params = {
+            "page": page,
+            "city": city,
+            "property_type": property_type,
+            "min_price": min_price,
+            "max_price": max_price,
+            "cursor": cursor,
+            "include_total": include_total.lower() if include_total else None,
+            "fields": fields or None,
+        }
+        result, status = response_cache.get_or_compute(
+            "properties", params, lambda: get_all_properties(**params)
         )
-        return result, 200
+        return conditional_response(result, status)
     
     def post(self):
         """Create a new property (Admin only)."""
@@ -41,8 +59,10 @@ class Properties(Resource):
 class PropertyDetail(Resource):
     def get(self, property_id):
         """Get a single property by ID."""
-        result, status = get_property_by_id(property_id)
-        return result, status
+        result, status = response_cache.get_or_compute(
+            "property", {"id": property_id}, lambda: get_property_by_id(property_id)
+        )
+        return conditional_response(result, status, property_last_modified(result))
     
     def put(self, property_id):
         """Update a property (Admin only)."""
@@ -60,11 +80,92 @@ class FeaturedProperties(Resource):
     def get(self):
         """Get featured properties."""
         limit = request.args.get("limit", 6, type=int)
-        properties = get_featured_properties(limit=limit)
-        return {"properties": properties}, 200
+        fields = request.args.get("fields", type=str) or None
+        
+        def featured():
+            try:
+                return {"properties": get_featured_properties(limit=limit, fields=fields)}, 200
+            except ValueError as e:
+                return {"message": str(e)}, 400
+        
+        result, status = response_cache.get_or_compute(
+            "featured", {"limit": limit, "fields": fields}, featured
+        )
+        return conditional_response(result, status)
+
+
+class PropertySearch(Resource):
+    def get(self):
+        """Search properties by keyword and filters, with facet counts."""
+        params = {
+            "q": request.args.get("q", type=str) or None,
+            "city": request.args.get("city", type=str),
+            "property_type": request.args.get("property_type", type=str),
+            "min_price": request.args.get("min_price", type=int),
+            "max_price": request.args.get("max_price", type=int),
+            "min_bedrooms": request.args.get("min_bedrooms", type=int),
+            "min_area": request.args.get("min_area", type=int),
+            "max_area": request.args.get("max_area", type=int),
+            "amenities": request.args.get("amenities", type=str) or None,
+            "page": request.args.get("page", 1, type=int),
+            "fields": request.args.get("fields", type=str) or None,
+        }
+        result, status = response_cache.get_or_compute(
+            "search", params, lambda: search_properties(**params)
+        )
+        return conditional_response(result, status)
+
+
+class NearbyProperties(Resource):
+    def get(self):
+        """Get properties near a point, nearest first."""
+        params = {
+            "lat": request.args.get("lat", type=float),
+            "lng": request.args.get("lng", type=float),
+            "radius_km": request.args.get("radius", type=float),
+            "city": request.args.get("city", type=str),
+            "property_type": request.args.get("property_type", type=str),
+            "min_price": request.args.get("min_price", type=int),
+            "max_price": request.args.get("max_price", type=int),
+            "page": request.args.get("page", 1, type=int),
+            "fields": request.args.get("fields", type=str) or None,
+        }
+        result, status = response_cache.get_or_compute(
+            "nearby", params, lambda: get_nearby_properties(**params)
+        )
+        return conditional_response(result, status)
+
+
+class PropertyImport(Resource):
+    def post(self):
+        """Bulk import properties from CSV or NDJSON (Admin only)."""
+        stream, filename, content_type = request_upload()
+        upsert = request.args.get("upsert", "false", type=str).lower() == "true"
+        result, status = import_properties_from_stream(
+            stream, request.args.get("format", type=str), content_type, filename, upsert
+        )
+        return result, status
+
+
+class PropertyExport(Resource):
+    def get(self):
+        """Stream all properties as CSV or NDJSON (Admin only)."""
+        try:
+            chunks, fmt = export_all_properties(
+                request.args.get("format", type=str),
+                city=request.args.get("city", type=str),
+                property_type=request.args.get("property_type", type=str),
+            )
+        except ValueError as e:
+            return {"message": str(e)}, 400
+        return export_response(chunks, fmt, "properties")
 
 
 # Register resources
 api.add_resource(Properties, "/properties")
 api.add_resource(PropertyDetail, "/properties/<property_id>")
 api.add_resource(FeaturedProperties, "/properties/featured")
+api.add_resource(PropertySearch, "/properties/search")
+api.add_resource(NearbyProperties, "/properties/nearby")
+api.add_resource(PropertyImport, "/properties/import")
+api.add_resource(PropertyExport, "/properties/export")
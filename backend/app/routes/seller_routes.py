@@ -1,5 +1,7 @@
 from flask import Blueprint, request
 from flask_restful import Api, Resource
+from app.json_encoding import output_json
+from app.property_bulk import export_response, request_upload
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.controllers.seller_controller import (
     # Property management
@@ -7,6 +9,8 @@ from app.controllers.seller_controller import (
     get_seller_properties,
     update_seller_property,
     delete_seller_property,
+    import_seller_properties,
+    export_seller_properties,
     # Dashboard & insights
     get_seller_dashboard_stats,
     get_seller_recent_activity,
@@ -25,6 +29,7 @@ from app.controllers.seller_controller import (
 
 seller_bp = Blueprint("seller", __name__)
 api = Api(seller_bp)
+api.representations["application/json"] = output_json
 
 
 # ===== SELLER PROPERTY MANAGEMENT =====
@@ -63,6 +68,30 @@ class SellerPropertyDetail(Resource):
         return result, status
 
 
+class SellerPropertyImport(Resource):
+    @jwt_required()
+    def post(self):
+        """Bulk import listings from CSV or NDJSON."""
+        seller_id = get_jwt_identity()
+        stream, filename, content_type = request_upload()
+        result, status = import_seller_properties(
+            seller_id, stream, request.args.get("format", type=str), content_type, filename
+        )
+        return result, status
+
+
+class SellerPropertyExport(Resource):
+    @jwt_required()
+    def get(self):
+        """Stream the current seller's listings as CSV or NDJSON."""
+        seller_id = get_jwt_identity()
+        try:
+            chunks, fmt = export_seller_properties(seller_id, request.args.get("format", type=str))
+        except ValueError as e:
+            return {"message": str(e)}, 400
+        return export_response(chunks, fmt, "my-properties")
+
+
 # ===== SELLER DASHBOARD =====
 
 class SellerDashboard(Resource):
@@ -70,7 +99,8 @@ class SellerDashboard(Resource):
     def get(self):
         """Get seller dashboard statistics."""
         seller_id = get_jwt_identity()
-        result, status = get_seller_dashboard_stats(seller_id)
+        fresh = request.args.get("fresh", "false").lower() == "true"
+        result, status = get_seller_dashboard_stats(seller_id, fresh=fresh)
         return result, status
 
 
@@ -172,6 +202,8 @@ class PropertyView(Resource):
 
 # Seller property management
 api.add_resource(SellerProperties, "/seller/properties")
+api.add_resource(SellerPropertyImport, "/seller/properties/import")
+api.add_resource(SellerPropertyExport, "/seller/properties/export")
 api.add_resource(SellerPropertyDetail, "/seller/properties/<property_id>")
 
 # Seller dashboard
@@ -0,0 +1,114 @@
+"""
+Shared property serializer.
+
+Works on raw documents from ``QuerySet.as_pymongo()`` so list endpoints skip
+building mongoengine Document objects. Documents are accepted too and
+converted with ``to_mongo()``, which is fine for single-item responses.
+
+Missing keys fall back to the Property model defaults, so projected documents
+and old documents without newer fields serialize the same way.
+"""
+from mongoengine import Document
+
+from app.geo import point_coordinates
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def _str_or_none(value):
+    return str(value) if value else None
+
+
+def _geo(value):
+    coordinates = point_coordinates(value)
+    return {"lat": coordinates[0], "lng": coordinates[1]} if coordinates else None
+
+
+# Serialized property fields, in response order, and how to read each one
+# from a raw document. Field names match the Property document so a field
+# list doubles as the projection passed to .only().
+_PROPERTY_FIELD_GETTERS = {
+    "id": lambda doc: str(doc["_id"]),
+    "title": lambda doc: doc.get("title"),
+    "description": lambda doc: doc.get("description"),
+    "location": lambda doc: doc.get("location"),
+    "city": lambda doc: doc.get("city"),
+    "geo": lambda doc: _geo(doc.get("geo")),
+    "property_type": lambda doc: doc.get("property_type"),
+    "price": lambda doc: doc.get("price"),
+    "area": lambda doc: doc.get("area"),
+    "bedrooms": lambda doc: doc.get("bedrooms"),
+    "bathrooms": lambda doc: doc.get("bathrooms"),
+    "image": lambda doc: doc.get("image"),
+    "images": lambda doc: doc.get("images") or [],
+    "amenities": lambda doc: doc.get("amenities") or [],
+    "featured": lambda doc: doc.get("featured", False),
+    "verified": lambda doc: doc.get("verified", False),
+    "available": lambda doc: doc.get("available", True),
+    "status": lambda doc: doc.get("status", "Active"),
+    "likes_count": lambda doc: doc.get("likes_count", 0),
+    "interests_count": lambda doc: doc.get("interests_count", 0),
+    "visits_count": lambda doc: doc.get("visits_count", 0),
+    "views_count": lambda doc: doc.get("views_count", 0),
+    "seller_id": lambda doc: _str_or_none(doc.get("seller_id")),
+    "seller_name": lambda doc: doc.get("seller_name"),
+    "seller_email": lambda doc: doc.get("seller_email"),
+    "seller_phone": lambda doc: doc.get("seller_phone"),
+    "posted_date": lambda doc: _isoformat(doc.get("posted_date")),
+    # Handle both updated_at and updated_date field names for backward compatibility
+    "updated_at": lambda doc: _isoformat(doc.get("updated_at") or doc.get("updated_date")),
+}
+PROPERTY_FIELDS = tuple(_PROPERTY_FIELD_GETTERS)
+
+# Named field sets accepted by the `fields` parameter
+FIELD_PROFILES = {
+    "card": ("id", "title", "location", "city", "property_type", "price",
+             "area", "bedrooms", "image", "featured"),
+    "detail": PROPERTY_FIELDS,
+}
+
+
+def parse_fields(fields):
+    """Resolve a ``fields`` parameter into a tuple of serialized field names.
+
+    ``fields`` is a comma-separated mix of profile names and field names, e.g.
+    ``card`` or ``card,likes_count``. Returns None (every field) when it is
+    empty. Raises ValueError for unknown names.
+    """
+    if not fields:
+        return None
+
+    selected = {"id"}
+    for name in (part.strip() for part in fields.split(",")):
+        if not name:
+            continue
+        if name in FIELD_PROFILES:
+            selected.update(FIELD_PROFILES[name])
+        elif name in _PROPERTY_FIELD_GETTERS:
+            selected.add(name)
+        else:
+            raise ValueError(
+                f"Unknown field '{name}'. Use a profile ({', '.join(FIELD_PROFILES)}) "
+                f"or any of: {', '.join(PROPERTY_FIELDS)}"
+            )
+    return tuple(name for name in PROPERTY_FIELDS if name in selected)
+
+
+def project(query, fields, *required):
+    """Limit ``query`` to the document fields needed for ``fields``."""
+    if fields is None:
+        return query
+    return query.only(*set(fields).union(required))
+
+
+def serialize_property(doc, fields=None):
+    """Convert a raw property document (or a Property) to a JSON-serializable dict.
+
+    ``fields`` is a tuple from parse_fields(); None serializes every field.
+    """
+    if isinstance(doc, Document):
+        doc = doc.to_mongo()
+    getters = _PROPERTY_FIELD_GETTERS
+    return {name: getters[name](doc) for name in fields or PROPERTY_FIELDS}
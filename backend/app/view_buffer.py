@@ -0,0 +1,159 @@
+"""
+Write-behind buffer for property view counts.
+
+Views are the highest-volume write in the API. Instead of one update per
+request, increments are collected per property in memory and flushed as one
+unordered bulk_write of $inc operations every VIEW_BUFFER_FLUSH_INTERVAL_MS,
+or as soon as VIEW_BUFFER_MAX_PENDING views are waiting; set it to 1 to write
+every view through immediately. Pending views are flushed on shutdown.
+
+A crashed process loses the views it has not written yet. A failed flush
+keeps its views for the next attempt, so while Mongo writes fail they pile
+up; VIEW_BUFFER_MAX_LOSS caps the views held (pending plus being written)
+and views over the cap are dropped and counted as dropped_views. That cap is
+the most views a crash can lose.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounterBuffer:
+    """Collects view increments per property and flushes them in bulk."""
+
+    def __init__(self, flush_interval_ms=1000, max_pending=100, max_loss=1000):
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_pending = max(1, int(max_pending))
+        self.max_loss = max(self.max_pending, int(max_loss))
+        self._pending = {}
+        self._pending_events = 0
+        self._flushing_events = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._retry_after = 0.0
+        self._stats = {
+            "recorded_views": 0,
+            "flushed_views": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+            "dropped_views": 0,
+            "last_flush_at": None,
+        }
+
+    def record(self, property_id):
+        """Count one view for ``property_id``. Raises on an invalid id."""
+        prop_id = ObjectId(property_id)
+        with self._lock:
+            self._stats["recorded_views"] += 1
+            if self._pending_events + self._flushing_events >= self.max_loss:
+                self._stats["dropped_views"] += 1
+                return
+            self._pending[prop_id] = self._pending.get(prop_id, 0) + 1
+            self._pending_events += 1
+            should_flush = (
+                self._pending_events >= self.max_pending
+                and time.monotonic() >= self._retry_after
+            )
+
+        self._ensure_flusher()
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        """Write all pending increments with one bulk_write. Returns views written."""
+        from app.models.property_model import Property
+
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                # Views being written still count towards max_loss
+                views = self._flushing_events = self._pending_events
+                self._pending_events = 0
+            if not pending:
+                return 0
+
+            # updated_at moves with the counts so Last-Modified stays truthful
+            now = datetime.utcnow()
+            operations = [
+                UpdateOne({'_id': prop_id}, {'$inc': {'views_count': count}, '$set': {'updated_at': now}})
+                for prop_id, count in pending.items()
+            ]
+            try:
+                Property._get_collection().bulk_write(operations, ordered=False)
+            except Exception as e:
+                # Put the views back so the next flush retries them; record()
+                # kept pending plus flushing under max_loss, so they still fit
+                with self._lock:
+                    for prop_id, count in pending.items():
+                        self._pending[prop_id] = self._pending.get(prop_id, 0) + count
+                    self._pending_events += views
+                    self._flushing_events = 0
+                    self._stats["failed_flushes"] += 1
+                    # Leave retries to the flusher thread instead of every request
+                    self._retry_after = time.monotonic() + self.flush_interval
+                logger.error(f"Failed to flush {views} property views: {str(e)}")
+                return 0
+
+            with self._lock:
+                self._flushing_events = 0
+                self._stats["flushed_views"] += views
+                self._stats["flushes"] += 1
+                self._stats["last_flush_at"] = time.time()
+            return views
+
+    def stats(self):
+        """Return buffer counters for the metrics endpoint."""
+        with self._lock:
+            return dict(
+                self._stats,
+                pending_views=self._pending_events,
+                pending_properties=len(self._pending),
+                max_pending=self.max_pending,
+                max_loss=self.max_loss,
+                flush_interval_ms=int(self.flush_interval * 1000),
+            )
+
+    def close(self):
+        """Stop the flusher thread and write any pending views."""
+        self._wakeup.set()
+        self.flush()
+
+    def _ensure_flusher(self):
+        # Started lazily, and again after a fork, so each worker has its own thread
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._wakeup.clear()
+            self._thread = threading.Thread(target=self._run, name="view-buffer-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._wakeup.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"View buffer flusher error: {str(e)}")
+
+
+view_buffer = ViewCounterBuffer(
+    flush_interval_ms=Config.VIEW_BUFFER_FLUSH_INTERVAL_MS,
+    max_pending=Config.VIEW_BUFFER_MAX_PENDING,
+    max_loss=Config.VIEW_BUFFER_MAX_LOSS,
+)
+atexit.register(view_buffer.close)
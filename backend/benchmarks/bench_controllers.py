@@ -0,0 +1,85 @@
+"""Hot controller paths against the generated dataset."""
+import pytest
+
+from app.controllers.likes_controller import get_recommendations, like_property, unlike_property
+from app.controllers.property_controller import get_all_properties
+from app.controllers.seller_controller import get_seller_dashboard_stats
+from app.models.property_model import Property
+from recommendation_worker import RecommendationJob, RecommendationService, get_recommendation_service
+from similarity_index import SimilarityIndex
+
+
+def _ok(result):
+    body, status = result
+    assert status == 200, body
+    return body
+
+
+@pytest.fixture
+def liked_event(dataset):
+    prop = Property.objects(id=dataset['liked_property_id']).first()
+    return {
+        "user_id": dataset['user_id'],
+        "property_id": str(prop.id),
+        "property_title": prop.title,
+        "property_type": prop.property_type,
+        "location": prop.location,
+        "price": prop.price,
+        "geo": prop.geo,
+    }
+
+
+def test_get_all_properties_first_page(benchmark, dataset):
+    benchmark(lambda: _ok(get_all_properties()))
+
+
+def test_get_all_properties_deep_page(benchmark, dataset):
+    benchmark(lambda: _ok(get_all_properties(page=20, include_total='false')))
+
+
+def test_get_all_properties_city_filter(benchmark, dataset):
+    benchmark(lambda: _ok(get_all_properties(city='Mumbai', min_price=5000000, fields='card')))
+
+
+def test_get_all_properties_cursor(benchmark, dataset):
+    next_cursor = _ok(get_all_properties(cursor=''))['pagination']['next_cursor']
+    benchmark(lambda: _ok(get_all_properties(cursor=next_cursor)))
+
+
+def test_get_recommendations(benchmark, dataset):
+    body = benchmark(lambda: _ok(get_recommendations(dataset['user_id'])))
+    assert body['recommendations']
+
+
+def test_get_seller_dashboard_stats(benchmark, dataset):
+    benchmark(lambda: _ok(get_seller_dashboard_stats(dataset['seller_id'], fresh=True)))
+
+
+def test_find_similar_properties_index(benchmark, dataset, liked_event):
+    index = SimilarityIndex()
+    index.load_from_db()
+    benchmark(lambda: index.top_k(liked_event, k=5))
+
+
+def test_find_similar_properties_query(benchmark, dataset, liked_event):
+    service = RecommendationService()
+    # The Mongo fallback; a geocoded like takes the $near path, which mongomock lacks
+    event = dict(liked_event, geo=None)
+    benchmark(lambda: service.query_similar_properties(event))
+
+
+def test_recommendation_service_per_like(benchmark, dataset, liked_event):
+    # What each queued like pays: the shared service and pooled client, no connection setup
+    event = dict(liked_event, geo=None)
+    benchmark(lambda: get_recommendation_service().find_similar_properties(event))
+
+
+def test_like_unlike_cycle(benchmark, dataset):
+    user_id, property_id = dataset['user_id'], dataset['unliked_property_id']
+
+    def cycle():
+        _ok(like_property(user_id, property_id))
+        _ok(unlike_property(user_id, property_id))
+
+    benchmark(cycle)
+    RecommendationJob.objects.delete()
@@ -0,0 +1,47 @@
+"""Serializer and JSON encoding cost for one page of listings."""
+import json
+
+from app.json_encoding import dumps
+from app.models.property_model import Property
+from app.serializers import FIELD_PROFILES, serialize_property
+
+PAGE_SIZE = 12
+# An export-sized batch, where per-item cost dominates
+LARGE_PAGE_SIZE = 1000
+
+
+def _page(dataset, size=PAGE_SIZE):
+    return list(Property.objects.order_by('-likes_count').limit(size).as_pymongo())
+
+
+def test_serialize_property_raw(benchmark, dataset):
+    docs = _page(dataset)
+    benchmark(lambda: [serialize_property(doc) for doc in docs])
+
+
+def test_serialize_property_card_fields(benchmark, dataset):
+    docs = _page(dataset)
+    fields = FIELD_PROFILES["card"]
+    benchmark(lambda: [serialize_property(doc, fields) for doc in docs])
+
+
+def test_serialize_property_document(benchmark, dataset):
+    props = [Property._from_son(doc) for doc in _page(dataset)]
+    benchmark(lambda: [serialize_property(prop) for prop in props])
+
+
+def test_encode_property_page(benchmark, dataset):
+    docs = _page(dataset)
+    benchmark(lambda: dumps({"properties": [serialize_property(doc) for doc in docs]}))
+
+
+def test_encode_large_page(benchmark, dataset):
+    docs = _page(dataset, LARGE_PAGE_SIZE)
+    benchmark(lambda: dumps({"properties": [serialize_property(doc) for doc in docs]}))
+
+
+def test_encode_large_page_stdlib_json(benchmark, dataset):
+    # The same page through the stdlib encoder, to show what orjson saves
+    docs = _page(dataset, LARGE_PAGE_SIZE)
+    body = benchmark(lambda: json.dumps({"properties": [serialize_property(doc) for doc in docs]}).encode('utf-8'))
+    assert json.loads(body) == json.loads(dumps({"properties": [serialize_property(doc) for doc in docs]}))
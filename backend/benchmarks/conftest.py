@@ -0,0 +1,155 @@
+"""
+Fixtures for the pytest-benchmark suite.
+
+Each fixture size (number of properties, 1k and 100k by default) is
+generated once per session with synthetic_data.py into a throwaway database:
+mongomock by default, or a local mongod with --bench-mongo-uri. mongomock
+keeps everything in memory in pure Python, so sizes over MOCK_MAX_SIZE are
+skipped on it. Run from this directory:
+
+    pip install -r requirements.txt
+    pytest                                          # 1k on mongomock, 100k skipped
+    pytest --bench-mongo-uri mongodb://localhost:27017/real_estate_bench
+
+Every run is compared with the latest baseline saved for the machine under
+baselines/<machine>/ (pytest.ini passes --benchmark-compare and
+--benchmark-compare-fail=min:25%), and fails when any fastest round is more
+than 25% slower; the minimum is far less disturbed by a busy machine than the
+median. Machines without a baseline only get a warning. After an
+intended change in speed, save a new baseline and commit it:
+
+    pytest --benchmark-save=baseline
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Like events are queued but not processed; no worker threads during timing
+os.environ.setdefault('RECOMMENDATION_EMBEDDED_WORKERS', 'False')
+os.environ.setdefault('SIMILARITY_INDEX_REFRESH_SECONDS', '86400')
+
+DEFAULT_MONGO_URI = 'mongomock://localhost/real_estate_bench'
+DEFAULT_SIZES = '1000,100000'
+MOCK_MAX_SIZE = 10000
+RECOMMENDED_LIKES = 24
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('bench', 'benchmark fixtures')
+    group.addoption(
+        '--bench-size', default=os.getenv('BENCH_SIZE', DEFAULT_SIZES),
+        help=f'comma-separated fixture sizes in properties (default: {DEFAULT_SIZES})',
+    )
+    group.addoption(
+        '--bench-mongo-uri', default=os.getenv('BENCH_MONGO_URI', DEFAULT_MONGO_URI),
+        help='mongomock://... (default) or a mongodb:// URI whose database name contains "bench"',
+    )
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_configure(config):
+    # pytest.ini always compares; on a machine with no saved baseline there is
+    # nothing to fail against, so keep pytest-benchmark's warning and skip the gate
+    session = getattr(config, '_benchmarksession', None)
+    if session is not None and session.compare_fail and not session.compared_mapping:
+        session.compare_fail = []
+
+
+def pytest_generate_tests(metafunc):
+    if 'bench_size' in metafunc.fixturenames:
+        sizes = [int(size) for size in metafunc.config.getoption('bench_size').split(',') if size]
+        metafunc.parametrize('bench_size', sizes, indirect=True, scope='session', ids=lambda size: f'{size}')
+
+
+@pytest.fixture(scope='session')
+def bench_size(request):
+    return request.param
+
+
+@pytest.fixture(scope='session')
+def bench_db(request):
+    """Connect mongoengine to the benchmark database."""
+    from mongoengine import connect, disconnect
+    from pymongo.uri_parser import parse_uri
+
+    uri = request.config.getoption('bench_mongo_uri')
+    if uri.startswith('mongomock://'):
+        import mongomock
+        uri = 'mongodb://' + uri[len('mongomock://'):]
+        connection = connect(host=uri, mongo_client_class=mongomock.MongoClient)
+    else:
+        connection = connect(host=uri)
+
+    db_name = parse_uri(uri).get('database') or ''
+    if 'bench' not in db_name:
+        disconnect()
+        pytest.exit(f'Refusing to use database "{db_name}": benchmark databases are dropped, '
+                    f'use a name containing "bench"', returncode=2)
+    yield connection[db_name]
+    disconnect()
+
+
+@pytest.fixture(scope='session')
+def dataset(request, bench_db, bench_size):
+    """Generate ``bench_size`` properties with proportional users and activity.
+
+    Returns ids the benchmarks work with: the most active user (with
+    recommendations), the largest seller and a property that user has not liked.
+    """
+    import random
+    from datetime import datetime
+
+    from app.models.like_model import Like
+    from app.models.property_model import Property
+    from app.models.user_model import User
+    from recommendation_worker import Recommendation
+    from synthetic_data import EMAIL_DOMAIN, generate
+
+    mocked = request.config.getoption('bench_mongo_uri').startswith('mongomock://')
+    if mocked and bench_size > MOCK_MAX_SIZE:
+        pytest.skip(f'{bench_size} properties needs --bench-mongo-uri; mongomock is limited to {MOCK_MAX_SIZE}')
+
+    bench_db.client.drop_database(bench_db.name)
+    generate(
+        properties=bench_size,
+        users=max(100, bench_size // 10),
+        likes=bench_size * 3,
+        visits=max(100, bench_size // 20),
+        interests=max(100, bench_size // 20),
+    )
+
+    top_user = next(Like.objects.aggregate([
+        {'$group': {'_id': '$user_id', 'likes': {'$sum': 1}}},
+        {'$sort': {'likes': -1}},
+        {'$limit': 1},
+    ]))['_id']
+    liked = [like['property_id'] for like in Like.objects(user_id=top_user).only('property_id').as_pymongo()]
+    property_ids = [doc['_id'] for doc in Property.objects.only('id').as_pymongo()]
+
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    Recommendation.ensure_indexes()
+    Recommendation._get_collection().insert_many([
+        {
+            'user_id': top_user,
+            'liked_property_id': prop_id,
+            'liked_property_title': 'Liked property',
+            'recommended_properties': [str(rec_id) for rec_id in rng.sample(property_ids, 5)],
+            'match_criteria': 'type_location_price',
+            'created_at': now,
+            'updated_at': now,
+        }
+        for prop_id in liked[:RECOMMENDED_LIKES]
+    ])
+
+    liked_set = set(liked)
+    return {
+        'user_id': str(top_user),
+        'seller_id': str(User.objects(email=f'seller0@{EMAIL_DOMAIN}').only('id').first().id),
+        'unliked_property_id': str(next(pid for pid in property_ids if pid not in liked_set)),
+        'liked_property_id': str(liked[0]),
+        'size': bench_size,
+    }
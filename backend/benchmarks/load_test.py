@@ -0,0 +1,288 @@
+"""
+HTTP load test across the API blueprints, reporting latency percentiles and
+throughput per route.
+
+Drives a running server (run.py, gunicorn or waitress) with a weighted mix of
+anonymous browsing, signed-in user traffic (likes, recommendations, visits)
+and seller dashboard traffic. Property ids are drawn with a Zipf skew so a few
+hot listings take most detail views and likes, as in production.
+
+Prepare a local database with the synthetic dataset first, whose users all
+share one password:
+
+    python synthetic_data.py --properties 100000 --users 20000 --likes 500000
+    gunicorn -w 4 -b 127.0.0.1:5000 run:app
+    python benchmarks/load_test.py --duration 60 --concurrency 32 --output load.json
+
+Failed requests (connection errors and 5xx) are counted per route and kept
+out of the latency figures. Like/unlike requests toggle the same listing so
+repeated runs leave the like counts where they started.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_data import EMAIL_DOMAIN, SYNTHETIC_PASSWORD  # noqa: E402
+
+PERCENTILES = (50, 95, 99)
+SAMPLE_PAGES = 10
+HOT_SKEW = 1.05
+
+
+class Client:
+    """One keep-alive HTTP connection per worker thread."""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.timeout = timeout
+        self.connection = None
+
+    def request(self, method, path, token=None, body=None):
+        """Return (status, parsed JSON body or None)."""
+        headers = {"Accept": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        if self.connection is None:
+            self.connection = self.connection_class(self.host, self.port, timeout=self.timeout)
+        try:
+            self.connection.request(method, path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = None
+            raise
+        try:
+            return response.status, json.loads(data) if data else None
+        except ValueError:
+            return response.status, None
+
+
+class Recorder:
+    """Thread-safe latency samples grouped by route."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.client_errors = defaultdict(int)
+
+    def record(self, route, seconds, status):
+        with self.lock:
+            if status is None or status >= 500:
+                self.errors[route] += 1
+            else:
+                if status >= 400:
+                    self.client_errors[route] += 1
+                self.latencies[route].append(seconds)
+
+    def report(self, elapsed):
+        routes = sorted(set(self.latencies) | set(self.errors))
+        rows = {}
+        for route in routes:
+            samples = np.array(self.latencies[route]) * 1000
+            row = {
+                "requests": len(samples) + self.errors[route],
+                "errors": self.errors[route],
+                "client_errors": self.client_errors[route],
+                "throughput_rps": round((len(samples) + self.errors[route]) / elapsed, 2),
+            }
+            for p in PERCENTILES:
+                row[f"p{p}_ms"] = round(float(np.percentile(samples, p)), 2) if len(samples) else None
+            row["max_ms"] = round(float(samples.max()), 2) if len(samples) else None
+            rows[route] = row
+        total = sum(row["requests"] for row in rows.values())
+        return {
+            "duration_s": round(elapsed, 2),
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 2),
+            "routes": rows,
+        }
+
+
+class LoadTest:
+    def __init__(self, base_url, users, sellers, timeout, seed):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.random = random.Random(seed)
+        self.recorder = Recorder()
+        client = Client(base_url, timeout)
+
+        self.property_ids, self.cities, self.points = [], set(), []
+        for page in range(1, SAMPLE_PAGES + 1):
+            status, body = client.request('GET', f'/properties?page={page}&fields=card,geo')
+            if status != 200 or not body.get("properties"):
+                break
+            for prop in body["properties"]:
+                self.property_ids.append(prop["id"])
+                self.cities.add(prop["city"])
+                if prop.get("geo"):
+                    self.points.append(prop["geo"])
+        if not self.property_ids:
+            sys.exit(f"No properties at {base_url} - run synthetic_data.py first")
+        self.cities = sorted(self.cities)
+        weights = 1.0 / np.arange(1, len(self.property_ids) + 1) ** HOT_SKEW
+        self.hot_weights = list(np.cumsum(weights / weights.sum()))
+
+        self.user_tokens = self._login(client, 'user', users)
+        self.seller_tokens = self._login(client, 'seller', sellers)
+        if not self.user_tokens or not self.seller_tokens:
+            sys.exit("Could not sign in synthetic users - run synthetic_data.py first")
+
+    def _login(self, client, prefix, count):
+        tokens = []
+        for i in range(count):
+            status, body = client.request('POST', '/auth/login', body={
+                "email": f"{prefix}{i}@{EMAIL_DOMAIN}", "password": SYNTHETIC_PASSWORD,
+            })
+            if status == 200:
+                tokens.append(body["token"])
+        return tokens
+
+    def _hot_property(self, rng):
+        return self.property_ids[min(bisect_left(self.hot_weights, rng.random()), len(self.property_ids) - 1)]
+
+    def scenarios(self):
+        """[(weight, action)]; an action maps a Random to [(route, method, path, token)]."""
+        def user(rng):
+            return rng.choice(self.user_tokens)
+
+        def seller(rng):
+            return rng.choice(self.seller_tokens)
+
+        def browse(rng):
+            params = {"page": rng.randint(1, 5), "fields": "card"}
+            if rng.random() < 0.5:
+                params["city"] = rng.choice(self.cities)
+            return [("GET /properties", 'GET', f"/properties?{urlencode(params)}", None)]
+
+        def detail(rng):
+            prop_id = self._hot_property(rng)
+            return [
+                ("GET /properties/<id>", 'GET', f"/properties/{prop_id}", None),
+                ("POST /properties/<id>/view", 'POST', f"/properties/{prop_id}/view", None),
+            ]
+
+        def search(rng):
+            params = {"city": rng.choice(self.cities), "min_bedrooms": rng.randint(1, 4)}
+            return [("GET /properties/search", 'GET', f"/properties/search?{urlencode(params)}", None)]
+
+        def nearby(rng):
+            if not self.points:
+                return []
+            point = rng.choice(self.points)
+            params = {"lat": point["lat"], "lng": point["lng"], "radius": 5}
+            return [("GET /properties/nearby", 'GET', f"/properties/nearby?{urlencode(params)}", None)]
+
+        def like_toggle(rng):
+            token, prop_id = user(rng), self._hot_property(rng)
+            return [
+                ("POST /likes/properties/<id>", 'POST', f"/likes/properties/{prop_id}", token),
+                ("DELETE /likes/properties/<id>", 'DELETE', f"/likes/properties/{prop_id}", token),
+            ]
+
+        def signed_in(route, path):
+            return lambda rng: [(route, 'GET', path, user(rng))]
+
+        def seller_view(route, path):
+            return lambda rng: [(route, 'GET', path, seller(rng))]
+
+        return [
+            (30, browse),
+            (20, detail),
+            (4, lambda rng: [("GET /properties/featured", 'GET', "/properties/featured", None)]),
+            (8, search),
+            (5, nearby),
+            (6, like_toggle),
+            (5, signed_in("GET /likes/properties", "/likes/properties")),
+            (5, signed_in("GET /likes/check", "/likes/check")),
+            (4, signed_in("GET /recommendations", "/recommendations")),
+            (4, signed_in("GET /recommendations/feed", "/recommendations/feed")),
+            (2, signed_in("GET /user/visits", "/user/visits")),
+            (3, seller_view("GET /seller/dashboard", "/seller/dashboard")),
+            (2, seller_view("GET /seller/activity", "/seller/activity")),
+            (2, seller_view("GET /seller/properties", "/seller/properties")),
+            (1, seller_view("GET /seller/visits", "/seller/visits")),
+            (1, seller_view("GET /seller/interests", "/seller/interests")),
+        ]
+
+    def _worker(self, seed, deadline):
+        rng = random.Random(seed)
+        client = Client(self.base_url, self.timeout)
+        scenarios = self.scenarios()
+        weights = [weight for weight, _ in scenarios]
+        actions = [action for _, action in scenarios]
+        while time.perf_counter() < deadline:
+            for route, method, path, token in rng.choices(actions, weights)[0](rng):
+                started = time.perf_counter()
+                try:
+                    status, _ = client.request(method, path, token)
+                except (OSError, http.client.HTTPException):
+                    status = None
+                self.recorder.record(route, time.perf_counter() - started, status)
+
+    def run(self, duration, concurrency):
+        started = time.perf_counter()
+        deadline = started + duration
+        threads = [
+            threading.Thread(target=self._worker, args=(self.random.random(), deadline), daemon=True)
+            for _ in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.recorder.report(time.perf_counter() - started)
+
+
+def print_report(report):
+    header = f"{'route':<34}{'reqs':>8}{'err':>6}{'4xx':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+    print(header)
+    print("-" * len(header))
+    for route, row in report["routes"].items():
+        cells = [row[f"p{p}_ms"] for p in PERCENTILES] + [row["max_ms"]]
+        latency = "".join(f"{value:>9.1f}" if value is not None else f"{'-':>9}" for value in cells)
+        print(f"{route:<34}{row['requests']:>8}{row['errors']:>6}{row['client_errors']:>6}"
+              f"{row['throughput_rps']:>9.1f}{latency}")
+    print("-" * len(header))
+    print(f"{report['requests']} requests in {report['duration_s']}s, {report['throughput_rps']} req/s "
+          f"(latencies in ms)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test the API and report per-route latency.')
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--duration', type=float, default=30, help='seconds to run')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent clients')
+    parser.add_argument('--users', type=int, default=50, help='synthetic users to sign in')
+    parser.add_argument('--sellers', type=int, default=10, help='synthetic sellers to sign in')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='also write the report as JSON to this file')
+    args = parser.parse_args()
+
+    load_test = LoadTest(args.base_url, args.users, args.sellers, args.timeout, args.seed)
+    report = load_test.run(args.duration, args.concurrency)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
@@ -0,0 +1,68 @@
+"""
+Bulk property import and export from the command line.
+
+Usage:
+    python bulk_properties.py import listings.csv
+    python bulk_properties.py import listings.ndjson --seller-id <user id>
+    python bulk_properties.py import listings.csv --upsert  # create unknown ids
+    python bulk_properties.py export properties.ndjson
+
+The format follows the file extension (.csv, .ndjson or .jsonl). See
+app/property_bulk.py for the column layout.
+"""
+import logging
+import sys
+import time
+
+from app import create_app
+from app.models.property_model import Property
+from app.models.user_model import User
+from app.property_bulk import detect_format, export_properties, import_properties
+from app.response_cache import invalidate_property_responses
+
+logger = logging.getLogger(__name__)
+
+
+def run_import(path, seller_id=None, upsert=False):
+    seller = None
+    if seller_id:
+        user = User.objects(id=seller_id).only('name', 'email').first()
+        if not user:
+            sys.exit(f"Seller {seller_id} not found")
+        seller = {"seller_id": user.id, "seller_name": user.name, "seller_email": user.email}
+    
+    started = time.perf_counter()
+    with open(path, 'rb') as handle:
+        report = import_properties(handle, detect_format(filename=path), seller=seller, upsert=upsert)
+    invalidate_property_responses()
+    
+    result = report.as_dict()
+    logger.info(
+        'Imported %s: %s inserted, %s updated, %s failed in %.1fs',
+        path, result["inserted"], result["updated"], result["failed"], time.perf_counter() - started,
+    )
+    for error in result["errors"][:20]:
+        logger.warning('Row %s: %s', error["row"], error["message"])
+    return result
+
+
+def run_export(path):
+    started = time.perf_counter()
+    with open(path, 'w', encoding='utf-8', newline='') as handle:
+        for chunk in export_properties(Property.objects(), detect_format(filename=path)):
+            handle.write(chunk)
+    logger.info('Exported properties to %s in %.1fs', path, time.perf_counter() - started)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if len(args) < 2 or args[0] not in ('import', 'export'):
+        sys.exit(__doc__)
+    
+    app = create_app()
+    with app.app_context():
+        if args[0] == 'import':
+            seller_id = args[args.index('--seller-id') + 1] if '--seller-id' in args else None
+            run_import(args[1], seller_id, upsert='--upsert' in args)
+        else:
+            run_export(args[1])
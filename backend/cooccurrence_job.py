@@ -0,0 +1,353 @@
+"""
+Item-to-item collaborative filtering from like co-occurrence.
+
+Builds a sparse co-occurrence matrix over the likes collection (how many users
+liked both properties), scores pairs with cosine similarity
+co(i, j) / sqrt(likes(i) * likes(j)) and stores the top neighbours of every
+property in property_neighbors, where the recommendation service reads them
+with one indexed lookup per like.
+
+Pair counts are kept in a NumPy state file, so a normal run only processes
+likes newer than the previous run and rewrites neighbours of the properties
+they touch. Unlikes are only reflected by a full rebuild.
+
+New likes are found by created_at, not _id: neither is written in commit
+order, so each run rereads COOCCURRENCE_OVERLAP_SECONDS before the newest
+created_at it has seen and skips the like ids it already counted there.
+
+Usage:
+    python cooccurrence_job.py            # incremental (full on first run)
+    python cooccurrence_job.py --full     # rebuild from every like
+
+Environment:
+    COOCCURRENCE_STATE_PATH       state file (default: cooccurrence_state.npz)
+    COOCCURRENCE_TOP_N            neighbours kept per property (default: 20)
+    COOCCURRENCE_WORKERS          processes for pair counting (default: all cores)
+    COOCCURRENCE_OVERLAP_SECONDS  window reread for late commits (default: 600)
+"""
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+from bson import ObjectId
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+STATE_PATH = os.getenv('COOCCURRENCE_STATE_PATH', 'cooccurrence_state.npz')
+TOP_N = int(os.getenv('COOCCURRENCE_TOP_N', 20))
+WORKERS = int(os.getenv('COOCCURRENCE_WORKERS', 0)) or os.cpu_count() or 1
+OVERLAP = timedelta(seconds=int(os.getenv('COOCCURRENCE_OVERLAP_SECONDS', 600)))
+
+# Only a user's most recent likes form pairs, which bounds the quadratic cost
+MAX_LIKES_PER_USER = 200
+# Pair keys pack two item codes into one int64: (i << KEY_SHIFT) | j
+KEY_SHIFT = 32
+KEY_MASK = (1 << KEY_SHIFT) - 1
+USERS_PER_TASK = 20000
+# Users per $in when rereading the likes of users with new likes
+USERS_PER_QUERY = 10000
+WRITE_BATCH_SIZE = 1000
+
+
+def _merge_counts(keys, counts):
+    """Sum counts of equal keys. Returns sorted unique keys and their totals."""
+    if not len(keys):
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    order = np.argsort(keys, kind='stable')
+    keys, counts = keys[order], counts[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return keys[starts], np.add.reduceat(counts, starts)
+
+
+def _count_pairs(items, offsets, new_flags=None):
+    """Count ordered item pairs for each user's slice ``items[offsets[u]:offsets[u+1]]``.
+
+    With ``new_flags`` only pairs involving at least one new like are counted.
+    """
+    keys = []
+    for start, end in zip(offsets[:-1], offsets[1:]):
+        user_items = items[start:end][-MAX_LIKES_PER_USER:]
+        if len(user_items) < 2:
+            continue
+        a = np.repeat(user_items, len(user_items))
+        b = np.tile(user_items, len(user_items))
+        keep = a != b
+        if new_flags is not None:
+            user_new = new_flags[start:end][-MAX_LIKES_PER_USER:]
+            keep &= np.repeat(user_new, len(user_items)) | np.tile(user_new, len(user_items))
+        keys.append((a[keep] << KEY_SHIFT) | b[keep])
+    if not keys:
+        return _merge_counts(np.array([], dtype=np.int64), np.array([], dtype=np.int64))
+    keys = np.concatenate(keys)
+    return _merge_counts(keys, np.ones(len(keys), dtype=np.int64))
+
+
+def _group_by_user(user_codes, item_codes, *extra):
+    order = np.lexsort((np.arange(len(user_codes)), user_codes))
+    users = user_codes[order]
+    offsets = np.r_[np.flatnonzero(np.r_[True, users[1:] != users[:-1]]), len(users)]
+    return (item_codes[order], offsets) + tuple(values[order] for values in extra)
+
+
+def _parallel_pair_counts(items, offsets):
+    """Count pairs across all cores, one task per block of users."""
+    bounds = list(range(0, len(offsets) - 1, USERS_PER_TASK)) + [len(offsets) - 1]
+    tasks = [
+        (items[offsets[lo]:offsets[hi]], offsets[lo:hi + 1] - offsets[lo])
+        for lo, hi in zip(bounds[:-1], bounds[1:])
+    ]
+    if WORKERS <= 1 or len(tasks) <= 1:
+        results = [_count_pairs(*task) for task in tasks]
+    else:
+        # Spawned, not forked: the parent holds a MongoClient and its threads
+        with ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context('spawn')) as pool:
+            results = list(pool.map(_count_pairs, *zip(*tasks)))
+    if not results:
+        return _merge_counts(np.array([], dtype=np.int64), np.array([], dtype=np.int64))
+    return _merge_counts(
+        np.concatenate([keys for keys, _ in results]),
+        np.concatenate([counts for _, counts in results]),
+    )
+
+
+class CooccurrenceState:
+    """Item codes, like counts, pair counts and the likes already processed.
+
+    ``watermark`` is the newest created_at processed; ``recent_likes`` maps the
+    ids of processed likes created within OVERLAP of it to their created_at.
+    """
+
+    def __init__(self):
+        self.item_ids = []
+        self.item_codes = {}
+        self.item_likes = np.zeros(0, dtype=np.int64)
+        self.keys = np.array([], dtype=np.int64)
+        self.counts = np.array([], dtype=np.int64)
+        self.watermark = None
+        self.recent_likes = {}
+
+    def code(self, prop_id):
+        key = str(prop_id)
+        if key not in self.item_codes:
+            self.item_codes[key] = len(self.item_ids)
+            self.item_ids.append(key)
+        return self.item_codes[key]
+
+    def add_likes(self, item_codes):
+        counts = np.bincount(item_codes, minlength=len(self.item_ids))
+        counts[:len(self.item_likes)] += self.item_likes
+        self.item_likes = counts
+
+    def add_pairs(self, keys, counts):
+        self.keys, self.counts = _merge_counts(
+            np.concatenate([self.keys, keys]), np.concatenate([self.counts, counts]),
+        )
+
+    def mark_processed(self, like_ids, created):
+        """Advance the watermark past ``like_ids`` and forget likes outside the overlap."""
+        for like_id, created_at in zip(like_ids, created):
+            if created_at is None:
+                continue
+            self.recent_likes[like_id] = created_at
+            if self.watermark is None or created_at > self.watermark:
+                self.watermark = created_at
+        if self.watermark is not None:
+            cutoff = self.watermark - OVERLAP
+            self.recent_likes = {
+                like_id: created_at for like_id, created_at in self.recent_likes.items()
+                if created_at >= cutoff
+            }
+
+    def save(self, path):
+        np.savez(
+            path,
+            item_ids=np.array(self.item_ids, dtype=str),
+            item_likes=self.item_likes,
+            keys=self.keys,
+            counts=self.counts,
+            watermark=np.array([self.watermark.isoformat() if self.watermark else '']),
+            recent_like_ids=np.array([str(like_id) for like_id in self.recent_likes], dtype=str),
+            recent_created=np.array([created.isoformat() for created in self.recent_likes.values()], dtype=str),
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Read a state file. Returns None for files without a created_at watermark."""
+        state = cls()
+        with np.load(path) as data:
+            if 'watermark' not in data.files:
+                return None
+            state.item_ids = [str(item) for item in data['item_ids']]
+            state.item_codes = {item: code for code, item in enumerate(state.item_ids)}
+            state.item_likes = data['item_likes']
+            state.keys = data['keys']
+            state.counts = data['counts']
+            watermark = str(data['watermark'][0])
+            state.watermark = datetime.fromisoformat(watermark) if watermark else None
+            state.recent_likes = {
+                ObjectId(str(like_id)): datetime.fromisoformat(str(created))
+                for like_id, created in zip(data['recent_like_ids'], data['recent_created'])
+            }
+        return state
+
+
+def _read_likes(query):
+    """Return (user ObjectIds, property ObjectIds, like ObjectIds, created_at) for a likes query."""
+    from app.models.like_model import Like
+
+    users, props, like_ids, created = [], [], [], []
+    cursor = Like._get_collection().find(
+        query, {'user_id': 1, 'property_id': 1, 'created_at': 1}, batch_size=10000,
+    ).sort([('created_at', 1), ('_id', 1)])
+    for like in cursor:
+        users.append(like['user_id'])
+        props.append(like['property_id'])
+        like_ids.append(like['_id'])
+        created.append(like.get('created_at'))
+    return users, props, like_ids, created
+
+
+def _codes(values, mapping):
+    return np.array([mapping(value) for value in values], dtype=np.int64)
+
+
+def build_full():
+    """Rebuild the state from every like."""
+    state = CooccurrenceState()
+    users, props, like_ids, created = _read_likes({})
+    if not like_ids:
+        return state, set()
+
+    user_codes = {}
+    user_array = _codes(users, lambda u: user_codes.setdefault(u, len(user_codes)))
+    item_array = _codes(props, state.code)
+    state.add_likes(item_array)
+
+    items, offsets = _group_by_user(user_array, item_array)
+    state.add_pairs(*_parallel_pair_counts(items, offsets))
+    state.mark_processed(like_ids, created)
+    return state, set(range(len(state.item_ids)))
+
+
+def build_incremental(state):
+    """Fold likes not yet processed into ``state``.
+
+    Reads likes created since OVERLAP before the watermark and skips the ones
+    already counted. Returns the codes of items whose neighbours changed.
+    """
+    since = {'created_at': {'$gte': state.watermark - OVERLAP}} if state.watermark else {}
+    new_users, new_props, new_ids, new_created = [], [], [], []
+    for user, prop, like_id, created in zip(*_read_likes(since)):
+        if like_id not in state.recent_likes:
+            new_users.append(user)
+            new_props.append(prop)
+            new_ids.append(like_id)
+            new_created.append(created)
+    if not new_ids:
+        return set()
+
+    # Pairs need every like of the affected users, old and new; each user's
+    # likes come from a single query, so their order is kept
+    users, props, like_ids = [], [], []
+    affected = list(set(new_users))
+    for start in range(0, len(affected), USERS_PER_QUERY):
+        chunk = _read_likes({'user_id': {'$in': affected[start:start + USERS_PER_QUERY]}})
+        users.extend(chunk[0])
+        props.extend(chunk[1])
+        like_ids.extend(chunk[2])
+    new_like_ids = set(new_ids)
+
+    user_codes = {}
+    user_array = _codes(users, lambda u: user_codes.setdefault(u, len(user_codes)))
+    item_array = _codes(props, state.code)
+    new_flags = np.array([like_id in new_like_ids for like_id in like_ids], dtype=bool)
+    state.add_likes(_codes(new_props, state.code))
+
+    items, offsets, flags = _group_by_user(user_array, item_array, new_flags)
+    keys, counts = _count_pairs(items, offsets, flags)
+    state.add_pairs(keys, counts)
+    state.mark_processed(new_ids, new_created)
+    return set((keys >> KEY_SHIFT).tolist())
+
+
+def _top_neighbors(state, touched):
+    """Yield (item code, [(neighbour code, score), ...]) for touched items."""
+    if not len(state.keys) or not touched:
+        return
+    first = state.keys >> KEY_SHIFT
+    mask = np.isin(first, np.fromiter(touched, dtype=np.int64))
+    first, second, counts = first[mask], state.keys[mask] & KEY_MASK, state.counts[mask]
+    likes = np.maximum(state.item_likes, 1).astype(np.float64)
+    scores = counts / np.sqrt(likes[first] * likes[second])
+
+    order = np.lexsort((-scores, first))
+    first, second, scores = first[order], second[order], scores[order]
+    starts = np.flatnonzero(np.r_[True, first[1:] != first[:-1]])
+    ends = np.r_[starts[1:], len(first)]
+    for start, end in zip(starts, ends):
+        end = min(end, start + TOP_N)
+        yield int(first[start]), list(zip(second[start:end].tolist(), scores[start:end].tolist()))
+
+
+def write_neighbors(state, touched):
+    """Upsert property_neighbors for every touched item. Returns documents written."""
+    from recommendation_worker import PropertyNeighbors
+
+    collection = PropertyNeighbors._get_collection()
+    now = datetime.utcnow()
+    operations, written = [], 0
+    for item, neighbors in _top_neighbors(state, touched):
+        operations.append(UpdateOne(
+            {'property_id': ObjectId(state.item_ids[item])},
+            {'$set': {
+                'neighbors': [[state.item_ids[j], round(score, 6)] for j, score in neighbors],
+                'updated_at': now,
+            }},
+            upsert=True,
+        ))
+        if len(operations) >= WRITE_BATCH_SIZE:
+            collection.bulk_write(operations, ordered=False)
+            written += len(operations)
+            operations = []
+    if operations:
+        collection.bulk_write(operations, ordered=False)
+        written += len(operations)
+    return written
+
+
+def run(full=False, state_path=STATE_PATH):
+    started = time.perf_counter()
+    state = None
+    if not full and os.path.exists(state_path):
+        state = CooccurrenceState.load(state_path)
+    if state is None:
+        state, touched = build_full()
+        mode = 'full'
+    else:
+        touched = build_incremental(state)
+        mode = 'incremental'
+
+    written = write_neighbors(state, touched)
+    state.save(state_path)
+    logger.info(
+        'Co-occurrence %s run: %s properties, %s pairs, %s neighbour lists written in %.1fs',
+        mode, len(state.item_ids), len(state.keys), written, time.perf_counter() - started,
+    )
+    return written
+
+
+if __name__ == '__main__':
+    from mongoengine import connect
+
+    from app.config import Config
+
+    # A bare connection: no app, request hooks or recommendation workers
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    connect(host=Config.MONGO_URI, **Config.mongo_client_options())
+    run(full='--full' in sys.argv[1:])
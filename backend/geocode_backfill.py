@@ -0,0 +1,74 @@
+"""
+Backfill Property.geo from an offline gazetteer.
+
+Each property's free-text location is matched against the gazetteer places
+of its city (e.g. "Bandra West, Mumbai" -> Bandra West); properties with no
+matching place get their city's centre. Properties already carrying
+coordinates are skipped unless --all is given.
+
+The gazetteer is a CSV with name, city, lat and lng columns; rows with an
+empty name are city centres. data/gazetteer.csv covers the seed data.
+
+Usage:
+    python geocode_backfill.py                  # properties without geo
+    python geocode_backfill.py --all            # re-geocode every property
+    python geocode_backfill.py path/to/gazetteer.csv
+
+Environment:
+    GAZETTEER_PATH   gazetteer file (default: data/gazetteer.csv)
+"""
+import logging
+import os
+import sys
+
+from pymongo import UpdateOne
+
+from app import create_app
+from app.geo import Gazetteer, geo_point
+from app.models.property_model import Property
+
+logger = logging.getLogger(__name__)
+
+GAZETTEER_PATH = os.getenv(
+    'GAZETTEER_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'gazetteer.csv'),
+)
+BATCH_SIZE = 1000
+
+
+def _flush(operations):
+    if operations:
+        Property._get_collection().bulk_write(operations, ordered=False)
+    return []
+
+
+def backfill(gazetteer, all_properties=False):
+    """Set geo on properties the gazetteer can place. Returns counts per precision."""
+    query = Property.objects() if all_properties else Property.objects(geo__exists=False)
+    counts = {"locality": 0, "city": 0, "unresolved": 0}
+    operations = []
+    
+    for doc in query.only('location', 'city').as_pymongo().batch_size(BATCH_SIZE):
+        coordinates, precision = gazetteer.lookup(doc.get('location'), doc.get('city'))
+        if coordinates is None:
+            counts["unresolved"] += 1
+            continue
+        counts[precision] += 1
+        operations.append(UpdateOne({'_id': doc['_id']}, {'$set': {'geo': geo_point(*coordinates)}}))
+        if len(operations) >= BATCH_SIZE:
+            operations = _flush(operations)
+    _flush(operations)
+    return counts
+
+
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    path = args[0] if args else GAZETTEER_PATH
+    
+    app = create_app()
+    with app.app_context():
+        Property.ensure_indexes()
+        counts = backfill(Gazetteer.load(path), all_properties='--all' in sys.argv[1:])
+        logger.info(
+            'Geocoded %s properties to a locality and %s to a city centre; %s unresolved',
+            counts["locality"], counts["city"], counts["unresolved"],
+        )
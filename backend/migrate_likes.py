@@ -0,0 +1,102 @@
+"""
+Migrate liked properties from the legacy User.liked_properties array into the
+Like collection. Safe to run more than once: existing likes are skipped.
+
+The arrays hold only property ids, not when each like happened, so created_at
+is recovered as well as the data allows:
+
+- the created_at of the recommendation generated for that like, when one is
+  still stored (the job ran moments after the like);
+- otherwise the later of the user's and the property's ObjectId generation
+  time, the earliest moment the like could have happened.
+
+Likes were appended to the array in order, so each user's timestamps are
+kept non-decreasing along it. Rebuild the co-occurrence state afterwards
+(python cooccurrence_job.py --full): the migrated likes are dated in the past
+and would fall below an incremental run's watermark.
+
+Usage:
+    python migrate_likes.py            # copy likes, keep the arrays
+    python migrate_likes.py --unset    # copy likes, then clear the arrays
+"""
+import logging
+import sys
+
+from pymongo import UpdateOne
+
+from app import create_app
+from app.models.like_model import Like
+from app.models.user_model import User
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+def _flush(operations):
+    if operations:
+        Like._get_collection().bulk_write(operations, ordered=False)
+    return []
+
+
+def _generation_time(object_id):
+    return object_id.generation_time.replace(tzinfo=None)
+
+
+def _like_times(user_id, property_ids):
+    """Estimate when ``user_id`` liked each of ``property_ids``, in array order."""
+    from recommendation_worker import Recommendation
+
+    recommended_at = {
+        rec['liked_property_id']: rec['created_at']
+        for rec in Recommendation._get_collection().find(
+            {'user_id': user_id, 'created_at': {'$exists': True}},
+            {'liked_property_id': 1, 'created_at': 1},
+        )
+    }
+    times, previous = [], None
+    for prop_id in property_ids:
+        liked_at = recommended_at.get(prop_id) or max(_generation_time(user_id), _generation_time(prop_id))
+        if previous is not None and liked_at < previous:
+            liked_at = previous
+        times.append(liked_at)
+        previous = liked_at
+    return times
+
+
+def migrate_likes(unset=False):
+    """Copy every user's liked_properties array into Like documents."""
+    app = create_app()
+    
+    with app.app_context():
+        Like.ensure_indexes()
+        operations = []
+        users = 0
+        likes = 0
+        
+        cursor = User.objects(liked_properties__exists=True, liked_properties__ne=[]) \
+            .only('liked_properties').as_pymongo()
+        for user in cursor:
+            users += 1
+            property_ids = user.get('liked_properties', [])
+            for prop_id, liked_at in zip(property_ids, _like_times(user['_id'], property_ids)):
+                likes += 1
+                operations.append(UpdateOne(
+                    {'user_id': user['_id'], 'property_id': prop_id},
+                    {'$setOnInsert': {'created_at': liked_at}},
+                    upsert=True,
+                ))
+                if len(operations) >= BATCH_SIZE:
+                    operations = _flush(operations)
+        _flush(operations)
+        logger.info("Migrated %s likes from %s users", likes, users)
+        
+        if unset:
+            User.objects(liked_properties__exists=True).update(unset__liked_properties=True)
+            logger.info("Cleared legacy liked_properties arrays")
+        
+        logger.info("Likes collection now holds %s likes", Like.objects.count())
+
+
+if __name__ == "__main__":
+    migrate_likes(unset="--unset" in sys.argv[1:])
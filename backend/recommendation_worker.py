@@ -1,16 +1,35 @@
 """
 Recommendation service utilities.
-Generates and stores recommendations directly without any message broker.
+
+Like events are queued as jobs in the recommendation_jobs collection and
+processed off the request path by a pool of worker threads. The pool runs
+inside the web process (RECOMMENDATION_EMBEDDED_WORKERS) or standalone:
+
+    python recommendation_worker.py
 """
 
 import logging
 import os
-from datetime import datetime
-from typing import Dict, List
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
 
 from bson import ObjectId
 from dotenv import load_dotenv
-from mongoengine import DateTimeField, Document, ListField, ObjectIdField, StringField, connect
+from mongoengine import (
+    DateTimeField,
+    DictField,
+    Document,
+    IntField,
+    ListField,
+    ObjectIdField,
+    StringField,
+    connect,
+)
+from mongoengine.connection import ConnectionFailure, get_connection
+
+from similarity_index import get_similarity_index, similarity_index_available
 
 load_dotenv()
 
@@ -20,6 +39,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Worker pool settings
+RECOMMENDATION_WORKERS = int(os.getenv('RECOMMENDATION_WORKERS', 2))
+RECOMMENDATION_EMBEDDED_WORKERS = os.getenv('RECOMMENDATION_EMBEDDED_WORKERS', 'True').lower() == 'true'
+RECOMMENDATION_MAX_ATTEMPTS = int(os.getenv('RECOMMENDATION_MAX_ATTEMPTS', 5))
+RECOMMENDATION_MAX_BACKLOG = int(os.getenv('RECOMMENDATION_MAX_BACKLOG', 10000))
+RECOMMENDATION_POLL_SECONDS = float(os.getenv('RECOMMENDATION_POLL_SECONDS', 1.0))
+# A job claimed longer ago than this is assumed lost and claimed again
+JOB_LEASE_SECONDS = 60
+# Recommendations not refreshed by a like for this long are expired by Mongo
+RECOMMENDATION_TTL_DAYS = int(os.getenv('RECOMMENDATION_TTL_DAYS', 30))
+# Jobs that ran out of attempts are kept this long for inspection, then expired
+RECOMMENDATION_FAILED_JOB_TTL_DAYS = int(os.getenv('RECOMMENDATION_FAILED_JOB_TTL_DAYS', 7))
+# Radius for distance-ranked matches when the similarity index is unavailable
+RECOMMENDATION_GEO_RADIUS_KM = float(os.getenv('RECOMMENDATION_GEO_RADIUS_KM', 10))
+
 
 class Recommendation(Document):
     """Stores personalized property recommendations for a user."""
@@ -34,34 +68,104 @@ class Recommendation(Document):
 
     meta = {
         'collection': 'recommendations',
-        'indexes': ['user_id', 'liked_property_id', 'created_at'],
+        'indexes': [
+            {'fields': ('user_id', 'liked_property_id'), 'unique': True},
+            ('user_id', '-updated_at'),
+            {'fields': ['updated_at'], 'expireAfterSeconds': RECOMMENDATION_TTL_DAYS * 24 * 3600},
+        ],
+        # The unique index fails to build while duplicates exist, so indexes
+        # are created by ensure_recommendation_indexes() and --compact instead
+        'auto_create_index': False,
+        'strict': False,
+    }
+
+
+class PropertyNeighbors(Document):
+    """Top co-liked properties for a property, built by cooccurrence_job.py."""
+
+    property_id = ObjectIdField(required=True, unique=True)
+    # [[neighbour property id, score], ...] ordered by score descending
+    neighbors = ListField(default=[])
+    updated_at = DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        'collection': 'property_neighbors',
         'strict': False,
     }
 
 
+class RecommendationJob(Document):
+    """A queued like event waiting for recommendation generation."""
+
+    event = DictField(required=True)
+    status = StringField(default='pending')  # pending, processing, failed
+    attempts = IntField(default=0)
+    last_error = StringField()
+    available_at = DateTimeField(default=datetime.utcnow)
+    locked_until = DateTimeField()
+    created_at = DateTimeField(default=datetime.utcnow)
+    failed_at = DateTimeField()  # set only on failed jobs, which the TTL index expires
+
+    meta = {
+        'collection': 'recommendation_jobs',
+        'indexes': [
+            ('status', 'available_at'),
+            ('status', 'locked_until'),
+            {'fields': ['failed_at'], 'expireAfterSeconds': RECOMMENDATION_FAILED_JOB_TTL_DAYS * 24 * 3600},
+        ],
+    }
+
+
 class RecommendationService:
     """Generates and persists recommendations after a user likes a property."""
 
     def __init__(self, mongodb_uri: str | None = None):
-        self.mongodb_uri = mongodb_uri or os.getenv(
+        self.mongodb_uri = mongodb_uri or os.getenv('MONGO_URI') or os.getenv(
             'MONGODB_URI',
             'mongodb://localhost:27017/real_estate',
         )
         self._init_mongodb()
 
     def _init_mongodb(self) -> None:
+        # Reuse the app's pooled client when it is already connected
+        try:
+            get_connection()
+            return
+        except ConnectionFailure:
+            pass
+
         try:
+            from app.config import Config
+
             connect(
                 host=self.mongodb_uri,
                 connect=False,
-                serverSelectionTimeoutMS=5000,
+                **Config.mongo_client_options(),
             )
             logger.info('MongoDB connected: %s', self.mongodb_uri)
         except Exception as exc:
             logger.error('Failed to connect to MongoDB: %s', str(exc))
 
     def find_similar_properties(self, liked_property: Dict) -> List[str]:
+        if similarity_index_available():
+            recommended_ids = get_similarity_index().top_k(liked_property, k=5)
+            logger.info(
+                'Found %s similar properties in the similarity index for property %s',
+                len(recommended_ids),
+                liked_property.get('property_id'),
+            )
+            return recommended_ids
+
+        return self.query_similar_properties(liked_property)
+
+    def query_similar_properties(self, liked_property: Dict) -> List[str]:
+        """Find similar properties with a Mongo query (±20% price).
+
+        Geocoded properties are matched by distance, nearest first, within
+        RECOMMENDATION_GEO_RADIUS_KM; others need the exact location string.
+        """
         try:
+            from app.geo import point_coordinates
             from app.models.property_model import Property
 
             property_type = liked_property.get('property_type', '')
@@ -83,10 +187,18 @@ class RecommendationService:
 
             query = query(price__gte=min_price, price__lte=max_price)
 
-            if location:
-                query = query(location=location)
+            coordinates = point_coordinates(liked_property.get('geo'))
+            if coordinates:
+                lat, lng = coordinates
+                query = query(
+                    geo__near=[lng, lat], geo__max_distance=RECOMMENDATION_GEO_RADIUS_KM * 1000,
+                )
+            else:
+                if location:
+                    query = query(location=location)
+                query = query.order_by('-featured', '-likes_count')
 
-            recommendations = query.order_by('-featured', '-likes_count').limit(5)
+            recommendations = query.only('id').limit(5)
             recommended_ids = [str(prop.id) for prop in recommendations]
 
             logger.info(
@@ -100,25 +212,39 @@ class RecommendationService:
 
         except Exception as exc:
             logger.error('Error finding similar properties: %s', str(exc))
+            raise
+
+    def find_co_liked_properties(self, liked_property: Dict, limit: int = 5) -> List[str]:
+        """Return properties most often liked together with the liked one."""
+        try:
+            liked_id = ObjectId(liked_property.get('property_id', ''))
+        except Exception:
+            return []
+        neighbors = PropertyNeighbors.objects(property_id=liked_id).only('neighbors').first()
+        if not neighbors:
             return []
+        return [str(neighbor_id) for neighbor_id, _ in neighbors.neighbors[:limit]]
 
     def store_recommendation(
         self,
         user_id: str,
         liked_property: Dict,
         recommended_property_ids: List[str],
+        match_criteria: str = 'type_location_price',
     ) -> bool:
         try:
-            recommendation = Recommendation(
+            now = datetime.utcnow()
+            Recommendation.objects(
                 user_id=ObjectId(user_id),
                 liked_property_id=ObjectId(liked_property.get('property_id', '')),
-                liked_property_title=liked_property.get('property_title', ''),
-                recommended_properties=recommended_property_ids,
-                match_criteria='type_location_price',
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow(),
+            ).update_one(
+                upsert=True,
+                set__liked_property_title=liked_property.get('property_title', ''),
+                set__recommended_properties=recommended_property_ids,
+                set__match_criteria=match_criteria,
+                set__updated_at=now,
+                set_on_insert__created_at=now,
             )
-            recommendation.save()
 
             logger.info(
                 'Stored %s recommendations for user %s',
@@ -129,7 +255,7 @@ class RecommendationService:
 
         except Exception as exc:
             logger.error('Error storing recommendations: %s', str(exc))
-            return False
+            raise
 
     def process_like_event(self, event_data: Dict) -> bool:
         user_id = event_data.get('user_id')
@@ -137,15 +263,305 @@ class RecommendationService:
             logger.warning('Skipping recommendation generation: missing user_id')
             return False
 
-        similar_properties = self.find_similar_properties(event_data)
+        # Skip likes that were undone before the job ran
+        from app.models.like_model import Like
+
+        try:
+            still_liked = Like.objects(
+                user_id=ObjectId(user_id),
+                property_id=ObjectId(event_data.get('property_id', '')),
+            ).only('id').first()
+        except Exception:
+            still_liked = None
+        if not still_liked:
+            logger.info('Skipping recommendation generation: like no longer exists')
+            return False
+
+        # Co-liked properties first, then fill up with content-based matches
+        co_liked = self.find_co_liked_properties(event_data)
+        similar_properties = list(co_liked)
+        if len(similar_properties) < 5:
+            for prop_id in self.find_similar_properties(event_data):
+                if prop_id not in similar_properties:
+                    similar_properties.append(prop_id)
+            similar_properties = similar_properties[:5]
+
         if not similar_properties:
             logger.info('No similar properties found for user %s', user_id)
             return False
 
-        return self.store_recommendation(user_id, event_data, similar_properties)
+        match_criteria = 'co_likes+type_location_price' if co_liked else 'type_location_price'
+        return self.store_recommendation(user_id, event_data, similar_properties, match_criteria)
+
+
+_service: Optional[RecommendationService] = None
+_service_lock = threading.Lock()
+
+
+def get_recommendation_service() -> RecommendationService:
+    """Return the process-wide RecommendationService, creating it once."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = RecommendationService()
+                ensure_recommendation_indexes()
+    return _service
+
+
+def ensure_recommendation_indexes() -> bool:
+    """Create Recommendation indexes; fails while duplicates remain."""
+    try:
+        Recommendation.ensure_indexes()
+        return True
+    except Exception as exc:
+        logger.error(
+            'Could not create recommendation indexes (run python recommendation_worker.py --compact): %s',
+            str(exc),
+        )
+        return False
+
+
+def remove_recommendations_for_unlike(user_id: str, property_id: str) -> int:
+    """Delete the recommendations generated from a like that was undone."""
+    return Recommendation.objects(
+        user_id=ObjectId(user_id),
+        liked_property_id=ObjectId(property_id),
+    ).delete()
+
+
+def compact_recommendations() -> Dict[str, int]:
+    """Remove duplicate and orphaned recommendations, then build the indexes.
+
+    Keeps the most recently updated document per (user_id, liked_property_id)
+    and drops recommendations whose like no longer exists. Run
+    migrate_likes.py first so likes still held in user documents count. Also
+    stamps failed_at on jobs that failed before it existed, so the job TTL
+    index expires them too.
+    """
+    collection = Recommendation._get_collection()
+
+    duplicate_ids = []
+    for group in collection.aggregate([
+        {'$sort': {'updated_at': -1, 'created_at': -1}},
+        {'$group': {
+            '_id': {'user_id': '$user_id', 'liked_property_id': '$liked_property_id'},
+            'ids': {'$push': '$_id'},
+            'count': {'$sum': 1},
+        }},
+        {'$match': {'count': {'$gt': 1}}},
+    ], allowDiskUse=True):
+        duplicate_ids.extend(group['ids'][1:])
+
+    duplicates = 0
+    for start in range(0, len(duplicate_ids), 1000):
+        duplicates += collection.delete_many({'_id': {'$in': duplicate_ids[start:start + 1000]}}).deleted_count
+
+    orphan_ids = [doc['_id'] for doc in collection.aggregate([
+        {'$lookup': {
+            'from': 'likes',
+            'let': {'user_id': '$user_id', 'property_id': '$liked_property_id'},
+            'pipeline': [
+                {'$match': {'$expr': {'$and': [
+                    {'$eq': ['$user_id', '$$user_id']},
+                    {'$eq': ['$property_id', '$$property_id']},
+                ]}}},
+                {'$limit': 1},
+                {'$project': {'_id': 1}},
+            ],
+            'as': 'like',
+        }},
+        {'$match': {'like': {'$size': 0}}},
+        {'$project': {'_id': 1}},
+    ], allowDiskUse=True)]
+
+    orphans = 0
+    for start in range(0, len(orphan_ids), 1000):
+        orphans += collection.delete_many({'_id': {'$in': orphan_ids[start:start + 1000]}}).deleted_count
+
+    # Documents written before upserts have no updated_at and would never expire
+    collection.update_many({'updated_at': {'$exists': False}}, [{'$set': {'updated_at': '$created_at'}}])
+    # Likewise jobs that failed before failed_at existed
+    RecommendationJob._get_collection().update_many(
+        {'status': 'failed', 'failed_at': {'$exists': False}}, {'$set': {'failed_at': datetime.utcnow()}},
+    )
+
+    ensure_recommendation_indexes()
+    logger.info('Compacted recommendations: %s duplicates and %s orphans removed', duplicates, orphans)
+    return {'duplicates': duplicates, 'orphans': orphans}
 
 
 def generate_recommendations_for_like(event_data: Dict) -> bool:
-    """Entry point used by controllers to generate recommendations immediately."""
-    service = RecommendationService(mongodb_uri=os.getenv('MONGODB_URI'))
-    return service.process_like_event(event_data)
+    """Generate recommendations synchronously. Raises if generation fails."""
+    return get_recommendation_service().process_like_event(event_data)
+
+
+class RecommendationWorkerPool:
+    """Worker threads that claim and process queued recommendation jobs."""
+
+    def __init__(self, workers: int = RECOMMENDATION_WORKERS, poll_seconds: float = RECOMMENDATION_POLL_SECONDS):
+        self.workers = max(1, workers)
+        self.poll_seconds = poll_seconds
+        self.service: Optional[RecommendationService] = None
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._job_available = threading.Event()
+
+    def start(self) -> None:
+        if self.service is None:
+            self.service = get_recommendation_service()
+        self._stop.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._run,
+                name=f'recommendation-worker-{index}',
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+        logger.info('Started %s recommendation workers', self.workers)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._job_available.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def notify(self) -> None:
+        """Wake an idle worker because a job was just queued."""
+        self._job_available.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                job = claim_next_job()
+            except Exception as exc:
+                logger.error('Failed to claim recommendation job: %s', str(exc))
+                job = None
+
+            if job is None:
+                self._job_available.wait(self.poll_seconds)
+                self._job_available.clear()
+                continue
+
+            process_job(job, self.service)
+
+
+def claim_next_job() -> Optional[RecommendationJob]:
+    """Atomically claim the oldest runnable job, including expired leases."""
+    from mongoengine.queryset.visitor import Q
+
+    now = datetime.utcnow()
+    runnable = (
+        Q(status='pending', available_at__lte=now)
+        | Q(status='processing', locked_until__lte=now)
+    )
+    return RecommendationJob.objects(runnable).order_by('available_at').modify(
+        set__status='processing',
+        set__locked_until=now + timedelta(seconds=JOB_LEASE_SECONDS),
+        inc__attempts=1,
+        new=True,
+    )
+
+
+def process_job(job: RecommendationJob, service: RecommendationService) -> bool:
+    """Run one job; delete it on success, otherwise schedule a retry with backoff."""
+    try:
+        service.process_like_event(job.event)
+        job.delete()
+        return True
+    except Exception as exc:
+        if job.attempts >= RECOMMENDATION_MAX_ATTEMPTS:
+            job.update(set__status='failed', set__last_error=str(exc), set__failed_at=datetime.utcnow())
+            logger.error('Recommendation job %s failed after %s attempts: %s', job.id, job.attempts, str(exc))
+        else:
+            delay = 2 ** job.attempts
+            job.update(
+                set__status='pending',
+                set__last_error=str(exc),
+                set__available_at=datetime.utcnow() + timedelta(seconds=delay),
+            )
+            logger.warning('Recommendation job %s failed, retrying in %ss: %s', job.id, delay, str(exc))
+        return False
+
+
+_pool: Optional[RecommendationWorkerPool] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+_backlog = {'size': 0, 'checked_at': 0.0}
+
+
+def _ensure_embedded_pool() -> Optional[RecommendationWorkerPool]:
+    # Started again after a fork, so each web worker owns its threads
+    global _pool, _pool_pid
+    if not RECOMMENDATION_EMBEDDED_WORKERS:
+        return None
+    if _pool is not None and _pool_pid == os.getpid():
+        return _pool
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = RecommendationWorkerPool()
+            _pool.start()
+            _pool_pid = os.getpid()
+    return _pool
+
+
+def start_embedded_workers() -> None:
+    """Start this process's worker pool when RECOMMENDATION_EMBEDDED_WORKERS is on.
+
+    create_app calls this at startup, so jobs left queued by a previous run
+    are processed without waiting for a new like, and before each request,
+    which starts a fresh pool in workers forked from a preloaded app.
+    """
+    _ensure_embedded_pool()
+
+
+def _backlog_size() -> int:
+    # Refreshed at most once per second to keep enqueue to a single write
+    now = time.monotonic()
+    if now - _backlog['checked_at'] >= 1.0:
+        _backlog['size'] = RecommendationJob.objects(status='pending').count()
+        _backlog['checked_at'] = now
+    return _backlog['size']
+
+
+def enqueue_like_event(event_data: Dict) -> bool:
+    """Queue recommendation generation for a like.
+
+    Returns False without queueing when the backlog is over
+    RECOMMENDATION_MAX_BACKLOG; recommendations are best effort.
+    """
+    if _backlog_size() >= RECOMMENDATION_MAX_BACKLOG:
+        logger.warning('Recommendation backlog full, skipping like event for user %s', event_data.get('user_id'))
+        return False
+
+    RecommendationJob(event=event_data).save()
+    _backlog['size'] += 1
+
+    pool = _ensure_embedded_pool()
+    if pool:
+        pool.notify()
+    return True
+
+
+def run_consumer() -> None:
+    """Process queued jobs in the foreground until interrupted."""
+    pool = RecommendationWorkerPool()
+    pool.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        logger.info('Stopping recommendation workers')
+        pool.stop()
+
+
+if __name__ == '__main__':
+    import sys
+
+    if '--compact' in sys.argv[1:]:
+        get_recommendation_service()
+        compact_recommendations()
+    else:
+        run_consumer()
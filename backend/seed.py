@@ -140,10 +140,8 @@ def seed_database():
         Property.objects.delete()
         print("✓ Cleared existing properties")
         
-        # Add new properties
-        for prop_data in PROPERTIES_DATA:
-            prop = Property(**prop_data)
-            prop.save()
+        # Add new properties with one bulk insert
+        Property.objects.insert([Property(**prop_data) for prop_data in PROPERTIES_DATA], load_bulk=False)
         
         total = Property.objects.count()
         print(f"✓ Seeded database with {total} properties")
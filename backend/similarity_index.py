@@ -0,0 +1,368 @@
+"""
+In-memory similarity index over the property catalogue.
+
+Properties are held as NumPy arrays sorted by (property_type, price), so a
+lookup only scores a bounded window of same-type listings closest in price,
+with one vectorized pass over price, area, bedrooms, location/city codes, an
+amenity bitset and, when both listings have coordinates, their distance.
+Writes made through this process are applied incrementally via mongoengine
+signals; the whole index is reloaded every SIMILARITY_INDEX_REFRESH_SECONDS
+to pick up other processes' writes.
+
+NumPy is optional: without it the recommendation service falls back to the
+Mongo query in RecommendationService.query_similar_properties.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+    numpy_available = True
+except ImportError:
+    np = None
+    numpy_available = False
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY_INDEX_ENABLED = os.getenv('SIMILARITY_INDEX_ENABLED', 'True').lower() == 'true'
+SIMILARITY_INDEX_REFRESH_SECONDS = int(os.getenv('SIMILARITY_INDEX_REFRESH_SECONDS', 300))
+
+INDEX_FIELDS = (
+    'property_type', 'city', 'location', 'price', 'area', 'bedrooms',
+    'amenities', 'featured', 'likes_count', 'geo',
+)
+
+# Candidates are priced within [price / PRICE_WINDOW, price * PRICE_WINDOW];
+# at most MAX_CANDIDATES of them, closest in price, are scored per lookup
+PRICE_WINDOW = 2.0
+MAX_CANDIDATES = 4096
+AMENITY_BITS = 64
+# Distance at which the location score of two geocoded listings drops to 1/e
+GEO_DISTANCE_SCALE_KM = float(os.getenv('SIMILARITY_GEO_SCALE_KM', 5))
+EARTH_RADIUS_KM = 6371.0088
+# Pending incremental changes before the sorted arrays are rebuilt
+DELTA_REBUILD_THRESHOLD = 1000
+
+WEIGHTS = {
+    'price': 3.0,
+    'location': 2.0,
+    'area': 1.5,
+    'city': 1.0,
+    'bedrooms': 1.0,
+    'amenities': 1.0,
+    'featured': 0.3,
+    'popularity': 0.2,
+}
+
+
+def _popcount(values):
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values).astype(np.float64)
+    table = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+    return table[values.view(np.uint8)].reshape(-1, 8).sum(axis=1).astype(np.float64)
+
+
+def _distance_km(lat, lng, lats, lngs):
+    """Haversine distance from one point to arrays of points; NaN where unknown."""
+    lat, lng, lats, lngs = np.radians(lat), np.radians(lng), np.radians(lats), np.radians(lngs)
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lngs - lng) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _coordinates(value) -> tuple:
+    """(lat, lng) of a GeoJSON point or [lng, lat] pair; NaNs when missing."""
+    if isinstance(value, dict):
+        value = value.get('coordinates')
+    if not value or len(value) != 2:
+        return math.nan, math.nan
+    return float(value[1]), float(value[0])
+
+
+class SimilarityIndex:
+    """Vectorized top-k similar property lookup."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._codes: Dict[str, Dict[str, int]] = {'type': {}, 'city': {}, 'location': {}, 'amenity': {}}
+        self._arrays: Dict[str, 'np.ndarray'] = {}
+        self._type_ranges: Dict[int, tuple] = {}
+        self._positions: Dict[str, int] = {}
+        self._delta: Dict[str, tuple] = {}
+        self.loaded = False
+
+    # ----- building -----
+
+    def _code(self, kind: str, value) -> int:
+        codes = self._codes[kind]
+        key = (value or '').strip().lower()
+        if key not in codes:
+            codes[key] = len(codes)
+        return codes[key]
+
+    def _amenity_bits(self, amenities) -> int:
+        bits = 0
+        for amenity in amenities or []:
+            bits |= 1 << (self._code('amenity', amenity) % AMENITY_BITS)
+        return bits
+
+    def _row(self, doc: Dict) -> tuple:
+        prop_id = str(doc.get('_id') or doc.get('id') or doc.get('property_id') or '')
+        return (
+            prop_id,
+            self._code('type', doc.get('property_type')),
+            self._code('city', doc.get('city')),
+            self._code('location', doc.get('location')),
+            float(doc.get('price') or 0),
+            float(doc.get('area') or 0),
+            int(doc.get('bedrooms') or 0),
+            self._amenity_bits(doc.get('amenities')),
+            bool(doc.get('featured')),
+            int(doc.get('likes_count') or 0),
+            *_coordinates(doc.get('geo')),
+        )
+
+    def build(self, docs: Iterable[Dict]) -> None:
+        """Replace the index contents with ``docs`` (dicts of INDEX_FIELDS plus _id)."""
+        with self._lock:
+            self._build_rows([self._row(doc) for doc in docs])
+
+    def _build_rows(self, rows: List[tuple]) -> None:
+        columns = list(zip(*rows)) if rows else [()] * 12
+        ids = np.array(columns[0], dtype=object)
+        type_codes = np.array(columns[1], dtype=np.int32)
+        prices = np.array(columns[4], dtype=np.float64)
+
+        order = np.lexsort((prices, type_codes))
+        arrays = {
+            'id': ids[order],
+            'type': type_codes[order],
+            'city': np.array(columns[2], dtype=np.int32)[order],
+            'location': np.array(columns[3], dtype=np.int32)[order],
+            'price': prices[order],
+            'area': np.array(columns[5], dtype=np.float64)[order],
+            'bedrooms': np.array(columns[6], dtype=np.int32)[order],
+            'amenities': np.array(columns[7], dtype=np.uint64)[order],
+            'featured': np.array(columns[8], dtype=bool)[order],
+            'likes': np.array(columns[9], dtype=np.float64)[order],
+            'lat': np.array(columns[10], dtype=np.float64)[order],
+            'lng': np.array(columns[11], dtype=np.float64)[order],
+        }
+        arrays['alive'] = np.ones(len(order), dtype=bool)
+
+        type_ranges = {}
+        if len(order):
+            unique_types, starts = np.unique(arrays['type'], return_index=True)
+            ends = list(starts[1:]) + [len(order)]
+            type_ranges = {int(t): (int(s), int(e)) for t, s, e in zip(unique_types, starts, ends)}
+
+        self._arrays = arrays
+        self._type_ranges = type_ranges
+        self._positions = {prop_id: pos for pos, prop_id in enumerate(arrays['id'])}
+        self._delta = {}
+        self.loaded = True
+
+    def load_from_db(self) -> None:
+        from app.models.property_model import Property
+
+        docs = Property.objects.only(*INDEX_FIELDS).as_pymongo()
+        self.build(docs)
+        logger.info('Similarity index loaded with %s properties', len(self._positions))
+
+    # ----- incremental updates -----
+
+    def upsert(self, doc: Dict) -> None:
+        with self._lock:
+            row = self._row(doc)
+            self._mark_dead(row[0])
+            self._delta[row[0]] = row
+            if len(self._delta) >= DELTA_REBUILD_THRESHOLD:
+                self._compact()
+
+    def remove(self, prop_id) -> None:
+        with self._lock:
+            self._mark_dead(str(prop_id))
+            self._delta.pop(str(prop_id), None)
+
+    def _mark_dead(self, prop_id: str) -> None:
+        pos = self._positions.pop(prop_id, None)
+        if pos is not None:
+            self._arrays['alive'][pos] = False
+
+    def _compact(self) -> None:
+        a = self._arrays
+        rows = [
+            (a['id'][i], a['type'][i], a['city'][i], a['location'][i], a['price'][i], a['area'][i],
+             a['bedrooms'][i], int(a['amenities'][i]), a['featured'][i], a['likes'][i],
+             a['lat'][i], a['lng'][i])
+            for i in np.flatnonzero(a['alive'])
+        ]
+        self._build_rows(rows + list(self._delta.values()))
+
+    # ----- lookup -----
+
+    def _features(self, liked: Dict) -> tuple:
+        prop_id = str(liked.get('property_id') or liked.get('_id') or '')
+        if prop_id in self._delta:
+            return self._delta[prop_id]
+        pos = self._positions.get(prop_id)
+        if pos is not None:
+            a = self._arrays
+            return (prop_id, a['type'][pos], a['city'][pos], a['location'][pos], a['price'][pos],
+                    a['area'][pos], a['bedrooms'][pos], int(a['amenities'][pos]), a['featured'][pos], a['likes'][pos],
+                    a['lat'][pos], a['lng'][pos])
+        return self._row(liked)
+
+    def _score(self, q: tuple, c: Dict) -> 'np.ndarray':
+        _, _, city, location, price, area, bedrooms, amenities, _, _, lat, lng = q
+        score = np.zeros(len(c['id']), dtype=np.float64)
+
+        if price > 0:
+            price_ratio = np.abs(np.log(np.maximum(c['price'], 1.0) / price))
+            score += WEIGHTS['price'] * np.clip(1.0 - price_ratio / math.log(PRICE_WINDOW), 0.0, 1.0)
+        if area > 0:
+            score += WEIGHTS['area'] * np.exp(-np.abs(np.log(np.maximum(c['area'], 1.0) / area)))
+        if bedrooms > 0:
+            score += WEIGHTS['bedrooms'] * (1.0 - np.minimum(np.abs(c['bedrooms'] - bedrooms), 3) / 3.0)
+        same_location = c['location'] == location
+        if not math.isnan(lat):
+            # Distance replaces location-name equality where both listings are geocoded
+            distance = _distance_km(lat, lng, c['lat'], c['lng'])
+            nearby = np.exp(-distance / GEO_DISTANCE_SCALE_KM)
+            score += WEIGHTS['location'] * np.where(np.isnan(distance), same_location, nearby)
+        else:
+            score += WEIGHTS['location'] * same_location
+        score += WEIGHTS['city'] * (c['city'] == city)
+        if amenities:
+            query_bits = np.uint64(amenities)
+            union = _popcount(c['amenities'] | query_bits)
+            shared = _popcount(c['amenities'] & query_bits)
+            score += WEIGHTS['amenities'] * np.divide(shared, union, out=np.zeros_like(union), where=union > 0)
+        score += WEIGHTS['featured'] * c['featured']
+        score += WEIGHTS['popularity'] * np.minimum(np.log1p(c['likes']) / 10.0, 1.0)
+        return score
+
+    def _window(self, type_code: int, price: float) -> tuple:
+        """Positions of the MAX_CANDIDATES listings of a type priced closest to ``price``."""
+        start, end = self._type_ranges.get(int(type_code), (0, 0))
+        if end <= start or price <= 0:
+            return start, min(end, start + MAX_CANDIDATES)
+
+        type_prices = self._arrays['price'][start:end]
+        lo = start + int(np.searchsorted(type_prices, price / PRICE_WINDOW, 'left'))
+        hi = start + int(np.searchsorted(type_prices, price * PRICE_WINDOW, 'right'))
+        if hi - lo > MAX_CANDIDATES:
+            centre = start + int(np.searchsorted(type_prices, price))
+            lo = max(lo, centre - MAX_CANDIDATES // 2)
+            hi = min(hi, lo + MAX_CANDIDATES)
+        return lo, hi
+
+    def top_k(self, liked: Dict, k: int = 5) -> List[str]:
+        """Return ids of the ``k`` properties most similar to ``liked``.
+
+        ``liked`` needs property_id and, for properties not in the index yet,
+        property_type, location, price and optionally geo as in a like event.
+        """
+        with self._lock:
+            q = self._features(liked)
+            prop_id, type_code, price = q[0], q[1], q[4]
+            ids, scores = [], []
+
+            lo, hi = self._window(type_code, price)
+            if hi > lo:
+                window = {name: values[lo:hi] for name, values in self._arrays.items()}
+                score = self._score(q, window)
+                score[~window['alive']] = -np.inf
+                own_pos = self._positions.get(prop_id)
+                if own_pos is not None and lo <= own_pos < hi:
+                    score[own_pos - lo] = -np.inf
+                ids.append(window['id'])
+                scores.append(score)
+
+            delta_rows = [row for row in self._delta.values() if row[1] == type_code and row[0] != prop_id]
+            if delta_rows:
+                columns = list(zip(*delta_rows))
+                delta = {
+                    'id': np.array(columns[0], dtype=object),
+                    'city': np.array(columns[2]),
+                    'location': np.array(columns[3]),
+                    'price': np.array(columns[4], dtype=np.float64),
+                    'area': np.array(columns[5], dtype=np.float64),
+                    'bedrooms': np.array(columns[6]),
+                    'amenities': np.array(columns[7], dtype=np.uint64),
+                    'featured': np.array(columns[8], dtype=bool),
+                    'likes': np.array(columns[9], dtype=np.float64),
+                    'lat': np.array(columns[10], dtype=np.float64),
+                    'lng': np.array(columns[11], dtype=np.float64),
+                }
+                ids.append(delta['id'])
+                scores.append(self._score(q, delta))
+
+            if not ids:
+                return []
+
+            ids = np.concatenate(ids)
+            scores = np.concatenate(scores)
+            if len(scores) > k:
+                best = np.argpartition(-scores, k)[:k]
+            else:
+                best = np.arange(len(scores))
+            best = best[np.argsort(-scores[best], kind='stable')]
+            return [str(ids[i]) for i in best if scores[i] > -np.inf]
+
+
+_index: Optional[SimilarityIndex] = None
+_index_lock = threading.Lock()
+
+
+def similarity_index_available() -> bool:
+    return numpy_available and SIMILARITY_INDEX_ENABLED
+
+
+def _on_property_saved(sender, document, **kwargs):
+    if _index is not None and _index.loaded:
+        doc = {field: getattr(document, field, None) for field in INDEX_FIELDS}
+        doc['_id'] = document.id
+        _index.upsert(doc)
+
+
+def _on_property_deleted(sender, document, **kwargs):
+    if _index is not None and _index.loaded:
+        _index.remove(document.id)
+
+
+def _refresh_loop(index: SimilarityIndex) -> None:
+    while True:
+        time.sleep(SIMILARITY_INDEX_REFRESH_SECONDS)
+        try:
+            fresh = SimilarityIndex()
+            fresh.load_from_db()
+            with index._lock:
+                index.__dict__.update({k: v for k, v in fresh.__dict__.items() if k != '_lock'})
+        except Exception as exc:
+            logger.error('Similarity index refresh failed: %s', str(exc))
+
+
+def get_similarity_index() -> SimilarityIndex:
+    """Return the process-wide index, loading it and its refresh thread on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                from mongoengine import signals
+
+                from app.models.property_model import Property
+
+                index = SimilarityIndex()
+                index.load_from_db()
+                signals.post_save.connect(_on_property_saved, sender=Property)
+                signals.post_delete.connect(_on_property_deleted, sender=Property)
+                threading.Thread(
+                    target=_refresh_loop, args=(index,), name='similarity-index-refresh', daemon=True,
+                ).start()
+                _index = index
+    return _index
@@ -0,0 +1,314 @@
+"""
+Generate a production-sized synthetic dataset for load and benchmark runs.
+
+Builds on seed.py: listings reuse its property types, images and amenities,
+spread over the gazetteer cities and localities. Traffic is skewed the way
+real catalogues are:
+
+- cities follow a Zipf distribution, so the first few cities hold most listings
+- listing popularity is Zipfian too, so a handful of hot listings collect a
+  large share of likes, visits, interests and views
+- user activity is skewed, so some users like hundreds of listings and most
+  only a few
+
+Cached counters (likes_count, visits_count, ...) are written consistent with
+the generated likes, visits and interests. Generated users share the password
+SYNTHETIC_PASSWORD; sellers are seller<n>@synthetic.example and the other
+users user<n>@synthetic.example, both numbered from 0. Generated listings
+carry ``synthetic: true`` so --reset removes only generated data.
+
+Usage:
+    python synthetic_data.py --properties 100000 --users 20000 --likes 500000
+    python synthetic_data.py --reset                # remove generated data only
+    python synthetic_data.py --help
+
+Point MONGO_URI at a local or disposable database, never production.
+"""
+import argparse
+import csv
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from bson import ObjectId
+
+from app import bcrypt, create_app
+from app.geo import geo_point
+from app.models.like_model import Like
+from app.models.property_model import Property, PropertyInterest, ScheduledVisit
+from app.models.user_model import User
+from seed import PROPERTIES_DATA
+
+logger = logging.getLogger(__name__)
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'gazetteer.csv')
+EMAIL_DOMAIN = 'synthetic.example'
+SYNTHETIC_PASSWORD = 'synthetic-password'
+WRITE_BATCH_SIZE = 5000
+
+# Zipf exponents: larger means more skew towards the top ranks
+CITY_SKEW = 1.1
+POPULARITY_SKEW = 1.05
+USER_ACTIVITY_SKEW = 0.9
+SELLER_SKEW = 0.8
+# Share of users who also list properties
+SELLER_FRACTION = 0.05
+# Listings are posted over this many days before now
+POSTED_WINDOW_DAYS = 365
+# Coordinate jitter around a locality, in degrees (~2 km)
+GEO_JITTER = 0.02
+
+# Price per sq ft by property type; cities further down the ranking are cheaper
+PRICE_PER_SQFT = {
+    "Apartment": 9000,
+    "Villa": 12000,
+    "Row House": 7000,
+    "Penthouse": 20000,
+    "Studio": 8000,
+}
+VISIT_TIMES = ("10:00 AM", "11:30 AM", "1:00 PM", "3:00 PM", "4:30 PM", "6:00 PM")
+VISIT_STATUSES = ("Pending", "Confirmed", "Completed", "Cancelled")
+INTEREST_TYPES = ("General", "Serious", "Inquiry")
+INTEREST_STATUSES = ("New", "Contacted", "Closed")
+
+
+def zipf_weights(count, skew):
+    """Probabilities proportional to 1 / rank**skew for ranks 1..count."""
+    weights = 1.0 / np.arange(1, count + 1) ** skew
+    return weights / weights.sum()
+
+
+def load_places(path=GAZETTEER_PATH):
+    """Return [(city, centre, [(locality, (lat, lng)), ...])] in gazetteer order."""
+    cities = {}
+    with open(path, newline='', encoding='utf-8') as handle:
+        for row in csv.DictReader(handle):
+            entry = cities.setdefault(row['city'], [None, []])
+            coordinates = (float(row['lat']), float(row['lng']))
+            if row['name']:
+                entry[1].append((row['name'], coordinates))
+            else:
+                entry[0] = coordinates
+    return [(city, centre, localities) for city, (centre, localities) in cities.items() if centre]
+
+
+def _sample_pairs(rng, left_weights, right_weights, count):
+    """Draw up to ``count`` distinct (left, right) index pairs from the two distributions."""
+    if count <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    right_size = len(right_weights)
+    keys = np.empty(0, dtype=np.int64)
+    # Skewed draws repeat popular pairs, so oversample until enough are distinct
+    for _ in range(8):
+        needed = count - len(keys)
+        draw = int(needed * 1.5) + 16
+        left = rng.choice(len(left_weights), size=draw, p=left_weights)
+        right = rng.choice(right_size, size=draw, p=right_weights)
+        keys = np.unique(np.concatenate([keys, left.astype(np.int64) * right_size + right]))
+        if len(keys) >= count:
+            break
+    keys = rng.permutation(keys)[:count]
+    return keys // right_size, keys % right_size
+
+
+def _insert(collection, docs):
+    for start in range(0, len(docs), WRITE_BATCH_SIZE):
+        collection.insert_many(docs[start:start + WRITE_BATCH_SIZE], ordered=False)
+
+
+def build_users(count, sellers, now):
+    password = bcrypt.generate_password_hash(SYNTHETIC_PASSWORD).decode('utf-8')
+    users = []
+    for i in range(count):
+        prefix, number = ('seller', i) if i < sellers else ('user', i - sellers)
+        users.append({
+            "_id": ObjectId(),
+            "name": f"Synthetic {prefix.title()} {number}",
+            "email": f"{prefix}{number}@{EMAIL_DOMAIN}",
+            "password": password,
+            "failed_login_attempts": 0,
+            "locked_until": None,
+            "created_at": now,
+            "liked_properties": [],
+        })
+    return users
+
+
+def build_properties(rng, count, users, sellers, now):
+    places = load_places()
+    city_index = rng.choice(len(places), size=count, p=zipf_weights(len(places), CITY_SKEW))
+    seller_index = rng.choice(sellers, size=count, p=zipf_weights(sellers, SELLER_SKEW))
+    template_index = rng.integers(0, len(PROPERTIES_DATA), size=count)
+    bedrooms = rng.integers(1, 6, size=count)
+    area = (bedrooms * rng.normal(450, 90, size=count)).clip(250).astype(int)
+    price_factor = rng.lognormal(0.0, 0.25, size=count)
+    posted_offset = rng.uniform(0, POSTED_WINDOW_DAYS * 86400, size=count)
+    jitter = rng.uniform(-GEO_JITTER, GEO_JITTER, size=(count, 2))
+    types = list(PRICE_PER_SQFT)
+    type_index = rng.integers(0, len(types), size=count)
+
+    properties = []
+    for i in range(count):
+        city, centre, localities = places[city_index[i]]
+        if localities:
+            locality, (lat, lng) = localities[i % len(localities)]
+        else:
+            locality, (lat, lng) = f"Sector {i % 40 + 1}", centre
+        template = PROPERTIES_DATA[template_index[i]]
+        seller = users[seller_index[i]]
+        property_type = types[type_index[i]]
+        city_discount = 1.0 - 0.4 * city_index[i] / max(len(places) - 1, 1)
+        posted_date = now - timedelta(seconds=float(posted_offset[i]))
+        properties.append({
+            "_id": ObjectId(),
+            "title": f"{bedrooms[i]} BHK {property_type} in {locality}",
+            "description": template["description"],
+            "location": f"{locality}, {city}",
+            "city": city,
+            "geo": geo_point(float(lat + jitter[i, 0]), float(lng + jitter[i, 1])),
+            "property_type": property_type,
+            "price": int(area[i] * PRICE_PER_SQFT[property_type] * city_discount * price_factor[i]),
+            "area": int(area[i]),
+            "bedrooms": int(bedrooms[i]),
+            "bathrooms": int(max(1, bedrooms[i] - rng.integers(0, 2))),
+            "image": template["image"],
+            "images": [],
+            "amenities": list(template["amenities"]),
+            "seller_id": seller["_id"],
+            "seller_name": seller["name"],
+            "seller_email": seller["email"],
+            "seller_phone": "",
+            "featured": bool(rng.random() < 0.05),
+            "verified": bool(rng.random() < 0.6),
+            "available": True,
+            "status": "Active",
+            "likes_count": 0,
+            "interests_count": 0,
+            "visits_count": 0,
+            "views_count": 0,
+            "posted_date": posted_date,
+            "updated_at": posted_date,
+            "created_at": posted_date,
+            "synthetic": True,
+        })
+    return properties
+
+
+def generate(properties=10000, users=2000, likes=50000, visits=5000, interests=5000, seed=42):
+    """Write a synthetic dataset and return the number of documents per collection."""
+    rng = np.random.default_rng(seed)
+    now = datetime.utcnow()
+    sellers = max(1, int(users * SELLER_FRACTION))
+
+    started = time.perf_counter()
+    user_docs = build_users(users, sellers, now)
+    property_docs = build_properties(rng, properties, user_docs, sellers, now)
+
+    # Hot listings: a random subset of listings gets the top popularity ranks
+    popularity = zipf_weights(properties, POPULARITY_SKEW)[rng.permutation(properties)]
+    activity = zipf_weights(users, USER_ACTIVITY_SKEW)[rng.permutation(users)]
+
+    like_users, like_props = _sample_pairs(rng, activity, popularity, likes)
+    like_docs = [
+        {"_id": ObjectId(), "user_id": user_docs[u]["_id"], "property_id": property_docs[p]["_id"],
+         "created_at": now - timedelta(seconds=float(rng.uniform(0, 90 * 86400)))}
+        for u, p in zip(like_users, like_props)
+    ]
+
+    visit_docs = []
+    for u, p in zip(rng.choice(users, size=visits, p=activity), rng.choice(properties, size=visits, p=popularity)):
+        user, prop = user_docs[u], property_docs[p]
+        visit_docs.append({
+            "_id": ObjectId(),
+            "property_id": prop["_id"],
+            "user_id": user["_id"],
+            "seller_id": prop["seller_id"],
+            "visitor_name": user["name"],
+            "visitor_email": user["email"],
+            "visitor_phone": "",
+            "visit_date": now + timedelta(days=int(rng.integers(-30, 30))),
+            "visit_time": VISIT_TIMES[int(rng.integers(0, len(VISIT_TIMES)))],
+            "status": VISIT_STATUSES[int(rng.integers(0, len(VISIT_STATUSES)))],
+            "notes": "",
+            "created_at": now,
+            "updated_at": now,
+        })
+
+    interest_docs = []
+    for u, p in zip(rng.choice(users, size=interests, p=activity), rng.choice(properties, size=interests, p=popularity)):
+        user, prop = user_docs[u], property_docs[p]
+        interest_docs.append({
+            "_id": ObjectId(),
+            "property_id": prop["_id"],
+            "user_id": user["_id"],
+            "seller_id": prop["seller_id"],
+            "user_name": user["name"],
+            "user_email": user["email"],
+            "user_phone": "",
+            "message": "",
+            "interest_type": INTEREST_TYPES[int(rng.integers(0, len(INTEREST_TYPES)))],
+            "status": INTEREST_STATUSES[int(rng.integers(0, len(INTEREST_STATUSES)))],
+            "created_at": now - timedelta(seconds=float(rng.uniform(0, 30 * 86400))),
+        })
+
+    # Keep the cached counters consistent with the generated activity
+    index = {doc["_id"]: doc for doc in property_docs}
+    for counter, docs in (("likes_count", like_docs), ("visits_count", visit_docs),
+                          ("interests_count", interest_docs)):
+        for doc in docs:
+            index[doc["property_id"]][counter] += 1
+    views = rng.poisson(popularity * properties * 20)
+    for doc, count in zip(property_docs, views):
+        doc["views_count"] = int(count) + doc["likes_count"] * 5
+    logger.info('Generated documents in %.1fs', time.perf_counter() - started)
+
+    started = time.perf_counter()
+    counts = {}
+    for model, docs in ((User, user_docs), (Property, property_docs), (Like, like_docs),
+                        (ScheduledVisit, visit_docs), (PropertyInterest, interest_docs)):
+        model.ensure_indexes()
+        _insert(model._get_collection(), docs)
+        counts[model._get_collection_name()] = len(docs)
+    logger.info('Wrote %s in %.1fs', counts, time.perf_counter() - started)
+    return counts
+
+
+def reset():
+    """Delete generated users and listings and every like, visit and interest touching them."""
+    email_pattern = f"@{EMAIL_DOMAIN}$"
+    user_ids = [doc["_id"] for doc in User.objects(email__regex=email_pattern).only('id').as_pymongo()]
+    property_ids = [doc["_id"] for doc in Property.objects(__raw__={"synthetic": True}).only('id').as_pymongo()]
+
+    removed = {}
+    for model in (Like, ScheduledVisit, PropertyInterest):
+        collection = model._get_collection()
+        result = collection.delete_many({"$or": [
+            {"user_id": {"$in": user_ids}},
+            {"property_id": {"$in": property_ids}},
+        ]})
+        removed[model._get_collection_name()] = result.deleted_count
+    removed["properties"] = Property._get_collection().delete_many({"synthetic": True}).deleted_count
+    removed["user"] = User._get_collection().delete_many({"email": {"$regex": email_pattern}}).deleted_count
+    logger.info('Removed %s', removed)
+    return removed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a synthetic dataset for load tests.')
+    parser.add_argument('--properties', type=int, default=10000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--likes', type=int, default=50000)
+    parser.add_argument('--visits', type=int, default=5000)
+    parser.add_argument('--interests', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42, help='random seed, for reproducible datasets')
+    parser.add_argument('--reset', action='store_true', help='remove generated data and exit')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.reset:
+            reset()
+        else:
+            generate(args.properties, args.users, args.likes, args.visits, args.interests, args.seed)
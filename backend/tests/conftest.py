@@ -0,0 +1,91 @@
+"""
+Fixtures for the backend tests.
+
+Tests run against mongomock by default. Set TEST_MONGO_URI to a throwaway
+mongod database (its name must contain "test") to run them against a real
+server. From the backend directory:
+
+    pip install -r tests/requirements.txt
+    python -m pytest tests
+"""
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+from pymongo import monitoring
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('FLASK_ENV', 'development')
+# Like events are queued but not processed; no worker threads during tests
+os.environ.setdefault('RECOMMENDATION_EMBEDDED_WORKERS', 'False')
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts Mongo commands by name."""
+
+    def __init__(self):
+        self.counts = {}
+
+    def started(self, event):
+        self.counts[event.command_name] = self.counts.get(event.command_name, 0) + 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def reset(self):
+        self.counts = {}
+
+    def __getitem__(self, command_name):
+        return self.counts.get(command_name, 0)
+
+
+@pytest.fixture(scope='session')
+def commands():
+    return CommandCounter()
+
+
+@pytest.fixture(scope='session')
+def db(commands):
+    """Connect mongoengine to an empty test database, counting commands in ``commands``."""
+    from mongoengine import connect, disconnect
+
+    uri = os.getenv('TEST_MONGO_URI')
+    if uri:
+        from pymongo.uri_parser import parse_uri
+
+        db_name = parse_uri(uri).get('database') or ''
+        if 'test' not in db_name:
+            pytest.exit(f'Refusing to use database "{db_name}": test databases are dropped, '
+                        f'use a name containing "test"', returncode=2)
+        connection = connect(host=uri, event_listeners=[commands])
+    else:
+        import mongomock
+        from mongomock.collection import Collection
+
+        # mongomock sends no commands, so count the find calls pymongo would send
+        find = Collection.find
+
+        def counted_find(self, *args, **kwargs):
+            commands.started(SimpleNamespace(command_name='find'))
+            return find(self, *args, **kwargs)
+
+        Collection.find = counted_find
+        db_name = 'real_estate_test'
+        connection = connect(host=f'mongodb://localhost/{db_name}', mongo_client_class=mongomock.MongoClient)
+    yield connection[db_name]
+    connection.drop_database(db_name)
+    disconnect()
+
+
+@pytest.fixture
+def clean_db(db, commands):
+    """An empty database for one test."""
+    for name in db.list_collection_names():
+        db.drop_collection(name)
+    commands.reset()
+    return db
@@ -0,0 +1,63 @@
+"""Recommendations fetch every property on a page in one query."""
+from datetime import datetime, timedelta
+
+from app.controllers.likes_controller import get_recommendations
+from app.models.property_model import Property
+from app.models.user_model import User
+from recommendation_worker import Recommendation
+
+ITEMS_PER_PAGE = 12
+RECOMMENDED_PER_LIKE = 5
+
+
+def _seed(recommendations):
+    """Create a user with ``recommendations`` recommendations of 5 properties each."""
+    user = User(name="U", email="u@example.com", password="x").save()
+    now = datetime.utcnow()
+    for i in range(recommendations):
+        liked = Property(title=f"Liked {i}", description="d", location="Loc", city="Pune",
+                         property_type="Villa", price=100, area=100, bedrooms=1,
+                         bathrooms=1, image="img").save()
+        recommended = [
+            Property(title=f"Rec {i}-{j}", description="d", location="Loc", city="Pune",
+                     property_type="Villa", price=100, area=100, bedrooms=1,
+                     bathrooms=1, image="img").save()
+            for j in range(RECOMMENDED_PER_LIKE)
+        ]
+        Recommendation(
+            user_id=user.id,
+            liked_property_id=liked.id,
+            liked_property_title=liked.title,
+            recommended_properties=[str(prop.id) for prop in recommended],
+            updated_at=now - timedelta(minutes=i),
+        ).save()
+    return str(user.id)
+
+
+def _finds_for_page(commands, user_id, page):
+    commands.reset()
+    body, status = get_recommendations(user_id, page)
+    assert status == 200, body
+    return commands['find'], body
+
+
+def test_recommendations_query_count_independent_of_page_size(clean_db, commands):
+    single_user = _seed(1)
+    single_finds, single_body = _finds_for_page(commands, single_user, 1)
+    clean_db.client.drop_database(clean_db.name)
+    full_user = _seed(ITEMS_PER_PAGE)
+    full_finds, full_body = _finds_for_page(commands, full_user, 1)
+
+    assert len(single_body['recommendations']) == 1
+    assert len(full_body['recommendations']) == ITEMS_PER_PAGE
+    assert all(len(rec['recommended_properties']) == RECOMMENDED_PER_LIKE for rec in full_body['recommendations'])
+    assert full_finds == single_finds
+
+
+def test_recommendations_query_count_same_on_every_page(clean_db, commands):
+    user_id = _seed(ITEMS_PER_PAGE * 2 + 1)
+
+    finds = [_finds_for_page(commands, user_id, page)[0] for page in (1, 2, 3)]
+
+    assert finds[0] > 0
+    assert finds == [finds[0]] * 3